@@ -0,0 +1,183 @@
+# %% Imports
+from typing import List
+
+
+# %% Board masks
+# Squares are indexed 0..63 with a1=0, b1=1, ..., h1=7, a2=8, ..., h8=63
+FULLBOARD = 0xFFFFFFFFFFFFFFFF
+FILEA = 0x0101010101010101
+FILEB = FILEA << 1
+FILEG = FILEA << 6
+FILEH = FILEA << 7
+RANK1 = 0xFF
+RANK3 = RANK1 << 16
+RANK6 = RANK1 << 40
+RANK8 = RANK1 << 56
+NOTFILEA = FULLBOARD ^ FILEA
+NOTFILEH = FULLBOARD ^ FILEH
+NOTFILEAB = FULLBOARD ^ (FILEA | FILEB)
+NOTFILEGH = FULLBOARD ^ (FILEG | FILEH)
+
+# Ray directions. Positive shifts move towards h8, so the nearest blocker is the lowest bit.
+NORTH = 0
+EAST = 1
+NORTHEAST = 2
+NORTHWEST = 3
+SOUTH = 4
+WEST = 5
+SOUTHWEST = 6
+SOUTHEAST = 7
+DIRECTIONS: list[tuple[int, int]] = [  # (shift, mask keeping the step from wrapping around the board)
+    (8, FULLBOARD),
+    (1, NOTFILEA),
+    (9, NOTFILEA),
+    (7, NOTFILEH),
+    (-8, FULLBOARD),
+    (-1, NOTFILEH),
+    (-9, NOTFILEH),
+    (-7, NOTFILEA),
+]
+ROOKRAYS = [NORTH, EAST, SOUTH, WEST]
+BISHOPRAYS = [NORTHEAST, NORTHWEST, SOUTHWEST, SOUTHEAST]
+
+
+# %% Set-wise attack generation
+def shiftBy(bb: int, shift: int) -> int:
+    "Shifts bb by shift squares, dropping anything that falls off the board"
+    if shift > 0:
+        return (bb << shift) & FULLBOARD
+    return bb >> -shift
+
+
+def knightAttackSet(bb: int) -> int:
+    "Returns all squares attacked by the knights in bb"
+    l1 = (bb >> 1) & NOTFILEH
+    l2 = (bb >> 2) & NOTFILEGH
+    r1 = (bb << 1) & NOTFILEA
+    r2 = (bb << 2) & NOTFILEAB
+    h1 = l1 | r1
+    h2 = l2 | r2
+    return ((h1 << 16) | (h1 >> 16) | (h2 << 8) | (h2 >> 8)) & FULLBOARD
+
+
+def kingAttackSet(bb: int) -> int:
+    "Returns all squares attacked by the kings in bb"
+    row = bb | ((bb << 1) & NOTFILEA) | ((bb >> 1) & NOTFILEH)
+    return (row | (row << 8) | (row >> 8)) & FULLBOARD & ~bb
+
+
+def pawnAttackSet(bb: int, color: int) -> int:
+    "Returns all squares attacked by the pawns in bb. color is 0 for white, 1 for black."
+    if color == 0:
+        return (((bb << 7) & NOTFILEH) | ((bb << 9) & NOTFILEA)) & FULLBOARD
+    return ((bb >> 9) & NOTFILEH) | ((bb >> 7) & NOTFILEA)
+
+
+def bbSquares(bb: int) -> List[int]:
+    "Returns the square indexes of the set bits of bb, lowest first"
+    out = []
+    while bb:
+        bit = bb & -bb
+        out.append(bit.bit_length() - 1)
+        bb ^= bit
+    return out
+
+
+# %% Tables
+def getRaySquares() -> list[list[list[int]]]:
+    "Returns RAYSQUARES[direction][square], the squares eminating from square in direction, nearest first"
+    raySquares: list[list[list[int]]] = []
+    for shift, mask in DIRECTIONS:
+        byDirection = []
+        for sq in range(64):
+            line = []
+            bb = 1 << sq
+            while True:
+                bb = shiftBy(bb, shift) & mask
+                if not bb:
+                    break
+                line.append(bb.bit_length() - 1)
+            byDirection.append(line)
+        raySquares.append(byDirection)
+    return raySquares
+
+
+def getBetween(raySquares: list[list[list[int]]]) -> list[list[int]]:
+    "Returns BETWEEN[a][b], the squares strictly between a and b if they share a line, else 0"
+    between = [[0] * 64 for _ in range(64)]
+    for byDirection in raySquares:
+        for sq in range(64):
+            mask = 0
+            for other in byDirection[sq]:
+                between[sq][other] = mask
+                mask |= 1 << other
+    return between
+
+
+def getLine(raySquares: list[list[list[int]]]) -> list[list[int]]:
+    "Returns LINE[a][b], the full board-edge-to-edge line through a and b (including both) if aligned, else 0"
+    line = [[0] * 64 for _ in range(64)]
+    for d in range(4):
+        for sq in range(64):
+            full = 1 << sq
+            for other in raySquares[d][sq] + raySquares[d + 4][sq]:
+                full |= 1 << other
+            for other in raySquares[d][sq] + raySquares[d + 4][sq]:
+                line[sq][other] = full
+    return line
+
+
+RAYSQUARES = getRaySquares()
+RAYS: list[list[int]] = [[sum(1 << s for s in line) for line in byDirection] for byDirection in RAYSQUARES]
+BETWEEN = getBetween(RAYSQUARES)
+LINE = getLine(RAYSQUARES)
+KNIGHTATTACKS: list[int] = [knightAttackSet(1 << sq) for sq in range(64)]
+KINGATTACKS: list[int] = [kingAttackSet(1 << sq) for sq in range(64)]
+PAWNATTACKS: list[list[int]] = [[pawnAttackSet(1 << sq, color) for sq in range(64)] for color in (0, 1)]
+# Slider attacks on an empty board, for finding pieces that could pin or x-ray
+ROOKLINES: list[int] = [sum(RAYS[d][sq] for d in ROOKRAYS) for sq in range(64)]
+BISHOPLINES: list[int] = [sum(RAYS[d][sq] for d in BISHOPRAYS) for sq in range(64)]
+
+
+# %% Sliding attacks
+_NORTH, _EAST, _NORTHEAST, _NORTHWEST, _SOUTH, _WEST, _SOUTHWEST, _SOUTHEAST = RAYS
+
+
+def rookAttacks(sq: int, occupied: int) -> int:
+    "Squares attacked by a rook on sq, up to and including the first blocker in each direction"
+    attacks = 0
+    for rays in (_NORTH, _EAST):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (_SOUTH, _WEST):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishopAttacks(sq: int, occupied: int) -> int:
+    "Squares attacked by a bishop on sq, up to and including the first blocker in each direction"
+    attacks = 0
+    for rays in (_NORTHEAST, _NORTHWEST):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (_SOUTHWEST, _SOUTHEAST):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def queenAttacks(sq: int, occupied: int) -> int:
+    return rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)
@@ -0,0 +1,659 @@
+# %% Imports
+from typing import List, Literal, Union
+
+from attackTables import (
+    BETWEEN,
+    BISHOPLINES,
+    FULLBOARD,
+    KINGATTACKS,
+    KNIGHTATTACKS,
+    LINE,
+    NOTFILEA,
+    NOTFILEH,
+    PAWNATTACKS,
+    RANK1,
+    RANK3,
+    RANK6,
+    RANK8,
+    ROOKLINES,
+    bishopAttacks,
+    queenAttacks,
+    rookAttacks,
+)
+from pieceSquareTables import PHASE, PSQEG, PSQMG
+from zobrist import CASTLEKEYS, EPFILEKEYS, PIECEKEYS, SIDEKEY
+
+
+# %% Constants
+# Squares are indexed 0..63 with a1=0, b1=1, ..., h1=7, a2=8, ..., h8=63
+WHITE = 0
+BLACK = 1
+COLORNAMES = "wb"
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+PIECENAMES = "PNBRQK"
+NOPIECE = -1  # Piece codes are color * 6 + piece type, NOPIECE marks an empty square
+BLACKKING = BLACK * 6 + KING
+
+SQUARENAMES: list[str] = [f + r for r in "12345678" for f in "abcdefgh"]
+SQUAREINDEX: dict[str, int] = {s: i for i, s in enumerate(SQUARENAMES)}
+
+# Castling rights, one bit each
+CASTLEWK = 1
+CASTLEWQ = 2
+CASTLEBK = 4
+CASTLEBQ = 8
+
+# Rights kept when a piece moves from or to a square (king and rook home squares clear rights)
+CASTLEMASK: list[int] = [15] * 64
+CASTLEMASK[SQUAREINDEX["e1"]] = 15 ^ (CASTLEWK | CASTLEWQ)
+CASTLEMASK[SQUAREINDEX["h1"]] = 15 ^ CASTLEWK
+CASTLEMASK[SQUAREINDEX["a1"]] = 15 ^ CASTLEWQ
+CASTLEMASK[SQUAREINDEX["e8"]] = 15 ^ (CASTLEBK | CASTLEBQ)
+CASTLEMASK[SQUAREINDEX["h8"]] = 15 ^ CASTLEBK
+CASTLEMASK[SQUAREINDEX["a8"]] = 15 ^ CASTLEBQ
+
+# Piece that must be on each king and rook home square for the rights it clears above
+CASTLINGPIECES: dict[int, int] = {
+    SQUAREINDEX["e1"]: KING,
+    SQUAREINDEX["h1"]: ROOK,
+    SQUAREINDEX["a1"]: ROOK,
+    SQUAREINDEX["e8"]: BLACK * 6 + KING,
+    SQUAREINDEX["h8"]: BLACK * 6 + ROOK,
+    SQUAREINDEX["a8"]: BLACK * 6 + ROOK,
+}
+
+# FEN characters
+FENCHARS = "PNBRQKpnbrqk"  # By piece code
+FENPIECES: dict[str, int] = {ch: i for i, ch in enumerate(FENCHARS)}
+FENCASTLING: dict[str, int] = {"K": CASTLEWK, "Q": CASTLEWQ, "k": CASTLEBK, "q": CASTLEBQ}
+
+# Moves are ints: oldSquare | newSquare << 6 | promotion piece type << 12 | flag << 15
+FLAGNONE = 0
+FLAGENPASSANT = 1
+FLAGSHORTCASTLE = 2
+FLAGLONGCASTLE = 3
+
+
+# %% Move encoding
+def encodeMove(oldSquare: int, newSquare: int, promoteTo: int = 0, flag: int = FLAGNONE) -> int:
+    "Packs a move into an int. promoteTo is a piece type (KNIGHT..QUEEN) or 0 for none."
+    return oldSquare | (newSquare << 6) | (promoteTo << 12) | (flag << 15)
+
+
+def moveOldSquare(m: int) -> int:
+    return m & 63
+
+
+def moveNewSquare(m: int) -> int:
+    return (m >> 6) & 63
+
+
+def movePromoteTo(m: int) -> int:
+    return (m >> 12) & 7
+
+
+def moveFlag(m: int) -> int:
+    return m >> 15
+
+
+def moveToUci(m: int) -> str:
+    "Returns move in long algebraic notation, e.g. e2e4 or e7e8q"
+    out = SQUARENAMES[m & 63] + SQUARENAMES[(m >> 6) & 63]
+    promoteTo = (m >> 12) & 7
+    if promoteTo:
+        out += PIECENAMES[promoteTo].lower()
+    return out
+
+
+# %% Position
+class position(object):
+    """Bitboard chess position. One int per piece type and color, plus occupancy per color,
+    a 64-entry mailbox of piece codes, side to move, castling rights and en passant square.
+    """
+
+    def __init__(self):
+        self.pieces: list[int] = [0] * 12
+        self.occupied: list[int] = [0, 0]  # Square set of each color's pieces
+        self.kingSquares: list[int] = [-1, -1]  # By color, updated as kings are placed
+        self.squares: list[int] = [NOPIECE] * 64
+        self.toMove: int = WHITE
+        self.castling: int = 0
+        self.epSquare: int = -1
+        self.halfmoveClock: int = 0
+        self.fullmoveNumber: int = 1
+        self.key: int = 0  # Zobrist hash, updated incrementally
+        self.mgScore: int = 0  # Material + piece-square score from white's perspective, middlegame tables
+        self.egScore: int = 0  # Same, endgame tables
+        self.phase: int = 0  # Non-pawn material weight, see pieceSquareTables.PHASEWEIGHTS
+        self.history: list[tuple[int, int, int, int, int, int]] = []  # Undo stack, see makeMove
+
+    @classmethod
+    def startPosition(cls) -> "position":
+        "Returns the standard starting position"
+        pos = cls()
+        backRank = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+        for f in range(8):
+            pos.putPiece(WHITE * 6 + backRank[f], f)
+            pos.putPiece(WHITE * 6 + PAWN, 8 + f)
+            pos.putPiece(BLACK * 6 + PAWN, 48 + f)
+            pos.putPiece(BLACK * 6 + backRank[f], 56 + f)
+        pos.castling = CASTLEWK | CASTLEWQ | CASTLEBK | CASTLEBQ
+        pos.key = pos.computeKey()
+        return pos
+
+    @classmethod
+    def fromFen(cls, fen: str) -> "position":
+        """Builds a position from Forsyth-Edwards Notation, e.g.
+        rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1. Move counters are optional.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN, expected at least 4 fields: {fen}")
+        pos = cls()
+        ranks = fields[0].split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"Invalid FEN board, expected 8 ranks: {fields[0]}")
+        for r, rank in enumerate(ranks):
+            sq = (7 - r) * 8
+            end = sq + 8
+            for ch in rank:
+                if ch in "12345678":
+                    sq += ord(ch) - 48
+                elif ch in FENPIECES and sq < end:
+                    pos.putPiece(FENPIECES[ch], sq)
+                    sq += 1
+                else:
+                    raise ValueError(f"Invalid FEN board, bad rank {rank}: {fields[0]}")
+            if sq != end:
+                raise ValueError(f"Invalid FEN board, rank {rank} is not 8 squares wide: {fields[0]}")
+        if pos.pieces[KING].bit_count() != 1 or pos.pieces[6 + KING].bit_count() != 1:
+            raise ValueError(f"Invalid FEN board, expected one king each: {fields[0]}")
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"Invalid FEN side to move: {fields[1]}")
+        pos.toMove = WHITE if fields[1] == "w" else BLACK
+        for ch in fields[2]:
+            pos.castling |= FENCASTLING.get(ch, 0)
+        # Drop rights whose king or rook is not on its start square, move generation assumes they are
+        for sq, p in CASTLINGPIECES.items():
+            if pos.squares[sq] != p:
+                pos.castling &= CASTLEMASK[sq]
+        if fields[3] != "-":
+            # Only kept when a pawn can take, matching what makeMove records
+            if fields[3] not in SQUAREINDEX:
+                raise ValueError(f"Invalid FEN en passant square: {fields[3]}")
+            epSquare = SQUAREINDEX[fields[3]]
+            if PAWNATTACKS[pos.toMove ^ 1][epSquare] & pos.pieces[pos.toMove * 6 + PAWN]:
+                pos.epSquare = epSquare
+        if len(fields) >= 6:
+            pos.halfmoveClock = int(fields[4])
+            pos.fullmoveNumber = int(fields[5])
+        pos.key = pos.computeKey()
+        return pos
+
+    def toFen(self) -> str:
+        "Returns the position in Forsyth-Edwards Notation. En passant is only given when a pawn can take."
+        rows = []
+        for r in range(7, -1, -1):
+            row = ""
+            gap = 0
+            for p in self.squares[r * 8 : r * 8 + 8]:
+                if p == NOPIECE:
+                    gap += 1
+                    continue
+                if gap:
+                    row += str(gap)
+                    gap = 0
+                row += FENCHARS[p]
+            rows.append(row + str(gap) if gap else row)
+        castling = "".join(ch for ch, right in FENCASTLING.items() if self.castling & right) or "-"
+        epSquare = SQUARENAMES[self.epSquare] if self.epSquare >= 0 else "-"
+        return (
+            f"{'/'.join(rows)} {COLORNAMES[self.toMove]} {castling} {epSquare} "
+            f"{self.halfmoveClock} {self.fullmoveNumber}"
+        )
+
+    def copy(self) -> "position":
+        new = position.__new__(position)
+        new.pieces = self.pieces[:]
+        new.occupied = self.occupied[:]
+        new.kingSquares = self.kingSquares[:]
+        new.squares = self.squares[:]
+        new.toMove = self.toMove
+        new.castling = self.castling
+        new.epSquare = self.epSquare
+        new.halfmoveClock = self.halfmoveClock
+        new.fullmoveNumber = self.fullmoveNumber
+        new.key = self.key
+        new.mgScore = self.mgScore
+        new.egScore = self.egScore
+        new.phase = self.phase
+        new.history = self.history[:]
+        return new
+
+    def putPiece(self, p: int, sq: int) -> None:
+        "Places piece code p on empty square sq"
+        bit = 1 << sq
+        self.pieces[p] |= bit
+        self.occupied[p // 6] |= bit
+        self.squares[sq] = p
+        self.key ^= PIECEKEYS[p][sq]
+        self.mgScore += PSQMG[p][sq]
+        self.egScore += PSQEG[p][sq]
+        self.phase += PHASE[p]
+        if p == KING or p == BLACKKING:
+            self.kingSquares[p // 6] = sq
+
+    def removePiece(self, sq: int) -> int:
+        "Removes and returns the piece code on sq"
+        p = self.squares[sq]
+        bit = 1 << sq
+        self.pieces[p] ^= bit
+        self.occupied[p // 6] ^= bit
+        self.squares[sq] = NOPIECE
+        self.key ^= PIECEKEYS[p][sq]
+        self.mgScore -= PSQMG[p][sq]
+        self.egScore -= PSQEG[p][sq]
+        self.phase -= PHASE[p]
+        return p
+
+    def computeKey(self) -> int:
+        """Computes the Zobrist hash of the position from scratch. Covers pieces, side to move,
+        castling rights and en passant file. Use after setting state directly rather than via moves.
+        """
+        key = CASTLEKEYS[self.castling]
+        for sq, p in enumerate(self.squares):
+            if p != NOPIECE:
+                key ^= PIECEKEYS[p][sq]
+        if self.epSquare >= 0:
+            key ^= EPFILEKEYS[self.epSquare & 7]
+        if self.toMove == BLACK:
+            key ^= SIDEKEY
+        return key
+
+    def __repr__(self) -> str:
+        rows = []
+        for r in reversed(range(8)):
+            row = ""
+            for f in range(8):
+                p = self.squares[r * 8 + f]
+                if p == NOPIECE:
+                    row += "."
+                elif p < 6:
+                    row += PIECENAMES[p]
+                else:
+                    row += PIECENAMES[p - 6].lower()
+            rows.append(row)
+        return "\n".join(rows) + f"\n{COLORNAMES[self.toMove]} to move"
+
+    @property
+    def colorToMove(self) -> Literal["w", "b"]:
+        return "w" if self.toMove == WHITE else "b"
+
+    def kingSquare(self, color: int) -> int:
+        return self.kingSquares[color]
+
+    # Attacks
+    def isSquareAttacked(self, sq: int, byColor: int, occupied: int | None = None) -> bool:
+        """Is square sq attacked by any piece of byColor? Sliders are blocked by occupied,
+        defaulting to the pieces on the board.
+        """
+        pieces = self.pieces
+        base = byColor * 6
+        if KNIGHTATTACKS[sq] & pieces[base + KNIGHT]:
+            return True
+        if PAWNATTACKS[byColor ^ 1][sq] & pieces[base + PAWN]:
+            return True
+        if KINGATTACKS[sq] & pieces[base + KING]:
+            return True
+        if occupied is None:
+            occupied = self.occupied[0] | self.occupied[1]
+        queens = pieces[base + QUEEN]
+        if bishopAttacks(sq, occupied) & (pieces[base + BISHOP] | queens):
+            return True
+        if rookAttacks(sq, occupied) & (pieces[base + ROOK] | queens):
+            return True
+        return False
+
+    def inCheck(self, color: int | None = None) -> bool:
+        "Is color (default side to move) in check?"
+        if color is None:
+            color = self.toMove
+        return self.isSquareAttacked(self.kingSquares[color], color ^ 1)
+
+    def attackersTo(self, sq: int, occupied: int) -> int:
+        "Returns the pieces of both colors attacking sq, with sliders blocked by occupied"
+        p = self.pieces
+        bishopsQueens = p[BISHOP] | p[QUEEN] | p[6 + BISHOP] | p[6 + QUEEN]
+        rooksQueens = p[ROOK] | p[QUEEN] | p[6 + ROOK] | p[6 + QUEEN]
+        return (
+            (PAWNATTACKS[BLACK][sq] & p[PAWN])
+            | (PAWNATTACKS[WHITE][sq] & p[6 + PAWN])
+            | (KNIGHTATTACKS[sq] & (p[KNIGHT] | p[6 + KNIGHT]))
+            | (KINGATTACKS[sq] & (p[KING] | p[6 + KING]))
+            | (bishopAttacks(sq, occupied) & bishopsQueens)
+            | (rookAttacks(sq, occupied) & rooksQueens)
+        )
+
+    def checkers(self, color: int | None = None) -> int:
+        "Returns the enemy pieces giving check to color (default side to move)"
+        if color is None:
+            color = self.toMove
+        occupied = self.occupied[0] | self.occupied[1]
+        return self.attackersTo(self.kingSquares[color], occupied) & self.occupied[color ^ 1]
+
+    def pinnedPieces(self, color: int | None = None) -> int:
+        "Returns the pieces of color (default side to move) that are the only blocker between their king and a slider"
+        if color is None:
+            color = self.toMove
+        pieces = self.pieces
+        base = (color ^ 1) * 6
+        kingSq = self.kingSquares[color]
+        occupied = self.occupied[0] | self.occupied[1]
+        queens = pieces[base + QUEEN]
+        snipers = (ROOKLINES[kingSq] & (pieces[base + ROOK] | queens)) | (
+            BISHOPLINES[kingSq] & (pieces[base + BISHOP] | queens)
+        )
+        pinned = 0
+        while snipers:
+            bit = snipers & -snipers
+            snipers ^= bit
+            blockers = BETWEEN[kingSq][bit.bit_length() - 1] & occupied
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers
+        return pinned & self.occupied[color]
+
+    # Move generation
+    def pseudoLegalMoves(self, capturesOnly: bool = False) -> List[int]:
+        """Returns all moves for the side to move REGARDLESS of if they leave the king in check.
+        If capturesOnly, only captures and promotions (for quiescence search).
+        """
+        return self._generateMoves(capturesOnly, legal=False)
+
+    def legalMoves(self, capturesOnly: bool = False) -> List[int]:
+        """Returns all legal moves for the side to move. If list length = 0, checkmate or stalemate!
+        If capturesOnly, only captures and promotions.
+        """
+        return self._generateMoves(capturesOnly, legal=True)
+
+    def _generateMoves(self, capturesOnly: bool, legal: bool) -> List[int]:
+        """Move generator behind pseudoLegalMoves and legalMoves. When legal, checkers and pinned pieces are
+        found once up front and every target set is masked by them, so no move has to be tried on the board:
+
+            - in double check only the king moves
+            - in single check other pieces may only capture the checker or block its line
+            - pinned pieces stay on the line through their king and the pinner
+            - the king only steps to squares not attacked once it has left its square
+            - en passant removes two pawns from a rank at once, so is checked against sliders directly
+        """
+        us = self.toMove
+        them = us ^ 1
+        pieces = self.pieces
+        own = self.occupied[us]
+        opp = self.occupied[them]
+        occupied = own | opp
+        empty = FULLBOARD ^ occupied
+        notOwn = FULLBOARD ^ own
+        base = us * 6
+        kingSq = self.kingSquares[us]
+        moves: list[int] = []
+        append = moves.append
+
+        if legal:
+            checkers = self.attackersTo(kingSq, occupied) & opp
+            pinned = self.pinnedPieces(us)
+            if not checkers:
+                checkMask = FULLBOARD
+            elif checkers & (checkers - 1):
+                checkMask = 0
+            else:
+                checkMask = checkers | BETWEEN[kingSq][checkers.bit_length() - 1]
+        else:
+            checkers = pinned = 0
+            checkMask = FULLBOARD
+        if capturesOnly:
+            notOwn = opp
+        line = LINE[kingSq]
+
+        if checkMask:
+            # Pawns. Targets are shifted sets, origin is recovered by subtracting the shift.
+            pawns = pieces[base + PAWN]
+            if us == WHITE:
+                push1 = (pawns << 8) & empty
+                push2 = ((push1 & RANK3) << 8) & empty
+                capturesLeft = (pawns << 7) & NOTFILEH & opp
+                capturesRight = (pawns << 9) & NOTFILEA & opp
+                forward, left, right = 8, 7, 9
+                promotionRank = RANK8
+            else:
+                push1 = (pawns >> 8) & empty
+                push2 = ((push1 & RANK6) >> 8) & empty
+                capturesLeft = (pawns >> 9) & NOTFILEH & opp
+                capturesRight = (pawns >> 7) & NOTFILEA & opp
+                forward, left, right = -8, -9, -7
+                promotionRank = RANK1
+            if capturesOnly:
+                push1 &= promotionRank
+                push2 = 0
+
+            for targets, delta in (
+                (push1 & checkMask, forward),
+                (capturesLeft & checkMask, left),
+                (capturesRight & checkMask, right),
+                (push2 & checkMask, 2 * forward),
+            ):
+                while targets:
+                    bit = targets & -targets
+                    targets ^= bit
+                    to = bit.bit_length() - 1
+                    fr = to - delta
+                    if pinned and (1 << fr) & pinned and not line[fr] & bit:
+                        continue
+                    if bit & promotionRank:
+                        for promoteTo in (QUEEN, ROOK, KNIGHT, BISHOP):
+                            append(fr | (to << 6) | (promoteTo << 12))
+                    else:
+                        append(fr | (to << 6))
+
+            if self.epSquare >= 0:
+                epSquare = self.epSquare
+                capturedBit = 1 << (epSquare - forward)
+                origins = PAWNATTACKS[them][epSquare] & pawns
+                if legal and not (checkers & capturedBit or checkMask & (1 << epSquare)):
+                    origins = 0  # Neither takes the checker nor blocks
+                while origins:
+                    bit = origins & -origins
+                    origins ^= bit
+                    if legal:
+                        after = (occupied ^ bit ^ capturedBit) | (1 << epSquare)
+                        queens = pieces[them * 6 + QUEEN]
+                        if rookAttacks(kingSq, after) & (pieces[them * 6 + ROOK] | queens) or bishopAttacks(
+                            kingSq, after
+                        ) & (pieces[them * 6 + BISHOP] | queens):
+                            continue
+                    append((bit.bit_length() - 1) | (epSquare << 6) | (FLAGENPASSANT << 15))
+
+            # Pieces
+            for pieceType in (KNIGHT, BISHOP, ROOK, QUEEN):
+                bb = pieces[base + pieceType]
+                while bb:
+                    bit = bb & -bb
+                    bb ^= bit
+                    fr = bit.bit_length() - 1
+                    if pieceType == KNIGHT:
+                        targets = KNIGHTATTACKS[fr]
+                    elif pieceType == BISHOP:
+                        targets = bishopAttacks(fr, occupied)
+                    elif pieceType == ROOK:
+                        targets = rookAttacks(fr, occupied)
+                    else:
+                        targets = queenAttacks(fr, occupied)
+                    targets &= notOwn & checkMask
+                    if bit & pinned:
+                        targets &= line[fr]
+                    while targets:
+                        toBit = targets & -targets
+                        targets ^= toBit
+                        append(fr | ((toBit.bit_length() - 1) << 6))
+
+        # King. It must not shield the squares behind it from a slider it steps away from.
+        targets = KINGATTACKS[kingSq] & notOwn
+        withoutKing = occupied ^ (1 << kingSq)
+        while targets:
+            toBit = targets & -targets
+            targets ^= toBit
+            to = toBit.bit_length() - 1
+            if legal and self.isSquareAttacked(to, them, withoutKing):
+                continue
+            append(kingSq | (to << 6))
+
+        # Castling - rights guarantee king and rook are on their home squares
+        if self.castling and not capturesOnly and not checkers:
+            shortRight, longRight = (CASTLEWK, CASTLEWQ) if us == WHITE else (CASTLEBK, CASTLEBQ)
+            if (
+                self.castling & shortRight
+                and not occupied & (0b01100000 << (kingSq - 4))
+                and not self.isSquareAttacked(kingSq, them)
+                and not self.isSquareAttacked(kingSq + 1, them)
+                and not self.isSquareAttacked(kingSq + 2, them)
+            ):
+                append(kingSq | ((kingSq + 2) << 6) | (FLAGSHORTCASTLE << 15))
+            if (
+                self.castling & longRight
+                and not occupied & (0b00001110 << (kingSq - 4))
+                and not self.isSquareAttacked(kingSq, them)
+                and not self.isSquareAttacked(kingSq - 1, them)
+                and not self.isSquareAttacked(kingSq - 2, them)
+            ):
+                append(kingSq | ((kingSq - 2) << 6) | (FLAGLONGCASTLE << 15))
+
+        return moves
+
+    # Executing moves
+    def applyMove(self, m: int) -> "position":
+        "Returns a new position after executing move m. Does not check legality."
+        new = self.copy()
+        new.makeMove(m)
+        return new
+
+    def makeMove(self, m: int) -> None:
+        "Executes m in place, pushing what is needed to undo it onto history. Does not check legality."
+        state = (m, NOPIECE, self.castling, self.epSquare, self.halfmoveClock, self.key)
+        captured = self._doMove(m)
+        self.history.append(state if captured == NOPIECE else (m, captured) + state[2:])
+
+    def unmakeMove(self) -> int:
+        "Undoes the last move made with makeMove, returning it"
+        m, captured, self.castling, self.epSquare, self.halfmoveClock, key = self.history.pop()
+        fr = m & 63
+        to = (m >> 6) & 63
+        flag = m >> 15
+        self.toMove ^= 1
+        us = self.toMove
+        if us == BLACK:
+            self.fullmoveNumber -= 1
+
+        # Move rook back when castling
+        if flag == FLAGSHORTCASTLE:
+            self.putPiece(self.removePiece(to - 1), to + 1)
+        elif flag == FLAGLONGCASTLE:
+            self.putPiece(self.removePiece(to + 1), to - 2)
+
+        # Move piece back, undoing promotion
+        p = self.removePiece(to)
+        self.putPiece(us * 6 + PAWN if (m >> 12) & 7 else p, fr)
+
+        # Restore captured piece
+        if captured != NOPIECE:
+            if flag == FLAGENPASSANT:
+                self.putPiece(captured, to - 8 if us == WHITE else to + 8)
+            else:
+                self.putPiece(captured, to)
+        self.key = key
+        return m
+
+    def _doMove(self, m: int) -> int:
+        "Executes m in place, returning the captured piece code (NOPIECE if none)"
+        fr = m & 63
+        to = (m >> 6) & 63
+        promoteTo = (m >> 12) & 7
+        flag = m >> 15
+        us = self.toMove
+        p = self.squares[fr]
+
+        # Remove captured piece
+        if flag == FLAGENPASSANT:
+            captured = self.removePiece(to - 8 if us == WHITE else to + 8)
+        elif self.squares[to] != NOPIECE:
+            captured = self.removePiece(to)
+        else:
+            captured = NOPIECE
+
+        # Move piece, handling promotion
+        self.removePiece(fr)
+        self.putPiece(us * 6 + promoteTo if promoteTo else p, to)
+
+        # Move rook when castling
+        if flag == FLAGSHORTCASTLE:
+            self.putPiece(self.removePiece(to + 1), to - 1)
+        elif flag == FLAGLONGCASTLE:
+            self.putPiece(self.removePiece(to - 2), to + 1)
+
+        # Update state. En passant is only recorded when a pawn can actually take, so equal positions hash equal.
+        castling = self.castling & CASTLEMASK[fr] & CASTLEMASK[to]
+        self.key ^= CASTLEKEYS[self.castling ^ castling] ^ SIDEKEY
+        self.castling = castling
+        if self.epSquare >= 0:
+            self.key ^= EPFILEKEYS[self.epSquare & 7]
+        isPawn = p == us * 6 + PAWN
+        epSquare = (fr + to) >> 1
+        if isPawn and abs(to - fr) == 16 and PAWNATTACKS[us][epSquare] & self.pieces[(us ^ 1) * 6 + PAWN]:
+            self.epSquare = epSquare
+            self.key ^= EPFILEKEYS[epSquare & 7]
+        else:
+            self.epSquare = -1
+        if isPawn or captured != NOPIECE:
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+        if us == BLACK:
+            self.fullmoveNumber += 1
+        self.toMove = us ^ 1
+        return captured
+
+
+# %% FEN files
+def loadFenFile(fp: str, limit: Union[int, None] = None) -> List[position]:
+    """Reads one position per line from a FEN or EPD file, e.g. a perft or test suite.
+    Anything after the fourth field that is not a move counter (EPD operations, ;-separated results) is ignored,
+    as are blank lines and lines starting with #.
+
+    Args:
+
+        fp (str) -- path to file
+
+        limit (int) -- stop after this many positions. Defaults to None (whole file).
+
+    Returns:
+
+        list of position
+    """
+    out = []
+    with open(fp) as f:
+        for line in f:
+            line = line.split(";", 1)[0].strip()
+            if not line or line[0] == "#":
+                continue
+            fields = line.split()
+            if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+                out.append(position.fromFen(" ".join(fields[:6])))
+            else:
+                out.append(position.fromFen(" ".join(fields[:4])))
+            if limit is not None and len(out) >= limit:
+                break
+    return out
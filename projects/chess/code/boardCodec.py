@@ -0,0 +1,171 @@
+# %% Imports
+from typing import List, Tuple
+
+import numpy as np
+
+from bitboard import BLACK, KING, NOPIECE, WHITE, position
+from pieceSquareTables import PHASE, PSQEG, PSQMG
+from zobrist import CASTLEKEYS, EPFILEKEYS, PIECEKEYS, SIDEKEY
+
+
+# %% Constants
+# A board is 34 bytes:
+#   bytes 0..31 -- squares a1..h8, two per byte, low nibble first. Nibble is piece code + 1, 0 for empty.
+#   byte 32 -- side to move | castling rights << 1
+#   byte 33 -- en passant file 0..7, NOEPFILE if none
+# Everything that decides which moves are legal is kept, move counters are not.
+BOARDBYTES = 34
+NOEPFILE = 8
+
+# Per piece code and square tables as arrays, with a 13th row of zeros that empty squares (NOPIECE) index
+SQUAREBITS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+PIECEKEYTABLE = np.array(PIECEKEYS + [[0] * 64], dtype=np.uint64)
+PSQMGTABLE = np.array(PSQMG + [[0] * 64], dtype=np.int32)
+PSQEGTABLE = np.array(PSQEG + [[0] * 64], dtype=np.int32)
+PHASETABLE = np.array(PHASE + [0], dtype=np.int32)
+CASTLEKEYTABLE = np.array(CASTLEKEYS, dtype=np.uint64)
+EPKEYTABLE = np.array(EPFILEKEYS + [0], dtype=np.uint64)  # By en passant file, NOEPFILE indexes the 0
+
+
+# %% Single positions
+def encodePosition(pos: position) -> bytes:
+    "Packs pos into BOARDBYTES bytes"
+    sq = pos.squares
+    out = bytearray(BOARDBYTES)
+    for i in range(32):
+        out[i] = (sq[2 * i] + 1) | ((sq[2 * i + 1] + 1) << 4)
+    out[32] = pos.toMove | (pos.castling << 1)
+    out[33] = pos.epSquare & 7 if pos.epSquare >= 0 else NOEPFILE
+    return bytes(out)
+
+
+def decodePosition(b: bytes) -> position:
+    "Unpacks a position packed by encodePosition. Move counters start from 0 and 1."
+    if len(b) != BOARDBYTES:
+        raise ValueError(f"Encoded board must be {BOARDBYTES} bytes, got {len(b)}")
+    pos = position()
+    for i in range(32):
+        low = b[i] & 15
+        high = b[i] >> 4
+        if low:
+            pos.putPiece(low - 1, 2 * i)
+        if high:
+            pos.putPiece(high - 1, 2 * i + 1)
+    pos.toMove = b[32] & 1
+    pos.castling = b[32] >> 1
+    if b[33] != NOEPFILE:
+        pos.epSquare = (40 if pos.toMove == WHITE else 16) + b[33]
+    pos.key = pos.computeKey()
+    return pos
+
+
+# %% Batches
+def encodeBatch(squares: np.ndarray, toMove: np.ndarray, castling: np.ndarray, epSquare: np.ndarray) -> np.ndarray:
+    """Packs many boards at once.
+
+    Args:
+
+        squares (array) -- (n, 64) piece codes per square, NOPIECE for empty
+
+        toMove (array) -- (n,) WHITE or BLACK
+
+        castling (array) -- (n,) castling right bits
+
+        epSquare (array) -- (n,) en passant square, -1 for none
+
+    Returns:
+
+        array -- (n, BOARDBYTES) uint8, one encoded board per row
+    """
+    squares = np.asarray(squares, dtype=np.int16)
+    nibbles = (squares + 1).astype(np.uint8)
+    out = np.empty((len(squares), BOARDBYTES), dtype=np.uint8)
+    out[:, :32] = nibbles[:, 0::2] | (nibbles[:, 1::2] << 4)
+    out[:, 32] = np.asarray(toMove, dtype=np.uint8) | (np.asarray(castling, dtype=np.uint8) << 1)
+    epSquare = np.asarray(epSquare, dtype=np.int16)
+    out[:, 33] = np.where(epSquare >= 0, epSquare & 7, NOEPFILE)
+    return out
+
+
+def decodeBatch(data) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Unpacks many boards at once.
+
+    Args:
+
+        data (array or bytes) -- (n, BOARDBYTES) uint8 array, or n encoded boards concatenated
+
+    Returns:
+
+        tuple of array -- squares (n, 64) int8 piece codes with NOPIECE for empty,
+            toMove (n,), castling (n,), epSquare (n,) with -1 for none
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.uint8)
+    data = np.asarray(data, dtype=np.uint8).reshape(-1, BOARDBYTES)
+    squares = np.empty((len(data), 64), dtype=np.int8)
+    squares[:, 0::2] = (data[:, :32] & 15).astype(np.int8) - 1
+    squares[:, 1::2] = (data[:, :32] >> 4).astype(np.int8) - 1
+    toMove = data[:, 32] & 1
+    castling = data[:, 32] >> 1
+    epFile = data[:, 33].astype(np.int16)
+    epSquare = np.where(epFile == NOEPFILE, -1, np.where(toMove == WHITE, 40, 16) + epFile)
+    return squares, toMove, castling, epSquare
+
+
+def encodePositions(positions: List[position]) -> np.ndarray:
+    "Packs a list of positions into an (n, BOARDBYTES) uint8 array"
+    return encodeBatch(
+        np.array([p.squares for p in positions], dtype=np.int16).reshape(-1, 64),
+        np.array([p.toMove for p in positions]),
+        np.array([p.castling for p in positions]),
+        np.array([p.epSquare for p in positions]),
+    )
+
+
+def decodePositions(data) -> List[position]:
+    """Unpacks encoded boards (array or concatenated bytes) into positions. Bitboards, Zobrist keys and
+    piece-square scores are worked out for the whole batch with numpy, leaving one object per board to fill in.
+    """
+    squares, toMove, castling, epSquare = decodeBatch(data)
+    codes = np.where(squares == NOPIECE, 12, squares).astype(np.intp)  # Row 12 of the tables is all zeros
+    cols = np.arange(64)
+    pieces = np.stack(
+        [np.bitwise_or.reduce(np.where(squares == p, SQUAREBITS, np.uint64(0)), axis=1) for p in range(12)], axis=1
+    )
+    occupied = np.stack([np.bitwise_or.reduce(pieces[:, c * 6 : c * 6 + 6], axis=1) for c in (WHITE, BLACK)], axis=1)
+    isKing = [squares == c * 6 + KING for c in (WHITE, BLACK)]
+    kingSquares = np.stack([np.where(k.any(axis=1), k.argmax(axis=1), -1) for k in isKing], axis=1)
+    epFile = np.where(epSquare >= 0, epSquare & 7, NOEPFILE)
+    keys = (
+        np.bitwise_xor.reduce(PIECEKEYTABLE[codes, cols], axis=1)
+        ^ CASTLEKEYTABLE[castling]
+        ^ EPKEYTABLE[epFile]
+        ^ np.where(toMove == BLACK, np.uint64(SIDEKEY), np.uint64(0))
+    )
+    mgScores = PSQMGTABLE[codes, cols].sum(axis=1)
+    egScores = PSQEGTABLE[codes, cols].sum(axis=1)
+    phases = PHASETABLE[codes].sum(axis=1)
+
+    out = []
+    columns = zip(
+        squares.tolist(),
+        pieces.tolist(),
+        occupied.tolist(),
+        kingSquares.tolist(),
+        toMove.tolist(),
+        castling.tolist(),
+        epSquare.tolist(),
+        keys.tolist(),
+        mgScores.tolist(),
+        egScores.tolist(),
+        phases.tolist(),
+    )
+    for row in columns:
+        pos = position.__new__(position)
+        pos.squares, pos.pieces, pos.occupied, pos.kingSquares, pos.toMove, pos.castling, pos.epSquare = row[:7]
+        pos.key, pos.mgScore, pos.egScore, pos.phase = row[7:]
+        pos.halfmoveClock = 0
+        pos.fullmoveNumber = 1
+        pos.history = []
+        out.append(pos)
+    return out
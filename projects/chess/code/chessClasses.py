@@ -1,6 +1,15 @@
 # %% Imports
-from copy import deepcopy
-from typing import List, Literal, Tuple, TypedDict, Union
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Iterable, Iterator, List, Literal, Tuple, TypedDict, Union
 
 import numpy as np
 import pandas as pd
@@ -8,7 +17,43 @@ import plotly.express as px
 
 # import plotly.graph_objects as go
 from collections import defaultdict
-from helpers import dfToTable, executeSql, getRelativeFp, logger
+from helpers import executeSql, getRelativeFp, logger
+
+from attackTables import BISHOPRAYS, KINGATTACKS, KNIGHTATTACKS, PAWNATTACKS, RAYSQUARES, ROOKRAYS, bbSquares
+from bitboard import (
+    BLACK,
+    CASTLEBK,
+    CASTLEBQ,
+    CASTLEWK,
+    CASTLEWQ,
+    COLORNAMES,
+    FLAGENPASSANT,
+    FLAGLONGCASTLE,
+    FLAGNONE,
+    FLAGSHORTCASTLE,
+    KING,
+    NOPIECE,
+    PAWN,
+    PIECENAMES,
+    QUEEN,
+    ROOK,
+    SQUAREINDEX,
+    SQUARENAMES,
+    WHITE,
+    encodeMove,
+    loadFenFile,
+    moveToUci,
+    position,
+)
+from boardCodec import decodePosition, decodePositions, encodePosition
+from evaluation import evaluate, see
+from notation import moveIndex
+from openingBook import openingBook, writeBookRows
+from parallelSearch import parallelSearch
+from perft import divide as perftDivide, perft
+from pgn import pgnGame, readPgn
+from search import pv2Str, searchResult, searcher
+from transposition import transpositionTable
 
 
 # %% Logging
@@ -153,7 +198,19 @@ SQUARES: list[str] = [
 PIECENAME = Literal["P", "R", "N", "B", "Q", "K"]
 DBPATH = getRelativeFp(__file__, "../data/db/chess.db")
 
-BOARDSCORES: dict[str, int] = {}
+TTSIZEMB = 64  # Memory budget of the shared transposition table
+SEARCHER: Union[searcher, None] = None  # Created on first use, see getSearcher
+
+GAMEURLPATTERN = re.compile(  # Game pages whose last path segment is a game id, e.g. https://lichess.org/abcd1234
+    r"^https?://(?:www\.)?(?:lichess\.org|chess\.com/game/(?:live|daily))/([A-Za-z0-9]+)(?:/(?:white|black))?/?$"
+)
+SEVENTAGROSTER = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+
+MOVECACHEMB = 64  # Memory budget of the move generation cache, per process
+MOVECACHEENTRYOVERHEAD = 120  # Bytes of a move cache entry besides its moves: key int and dict slot
+
+BOOKPATH = getRelativeFp(__file__, "../data/db/book.bin")  # Built by buildOpeningBook
+BOOK: Union[openingBook, None] = None  # Opened on first use, see getBook
 
 
 # %% Exceptions
@@ -168,49 +225,74 @@ class GameError(Exception):
 
 
 # %% Objects that go into squares
+PIECEVALUES: dict[str, int] = {"K": 100, "Q": 9, "R": 5, "B": 3, "N": 3, "P": 1}
+
+
 class empty(object):
-    "Empty square of board"
+    "Empty square of board. Stateless, so every empty square shares the one instance, EMPTY."
 
-    def __init__(self):
-        pass
+    __slots__ = ()
+    _instance: Union["empty", None] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __repr__(self) -> str:
         return "  "
 
+    def __reduce__(self):
+        return (empty, ())
+
+    def __copy__(self) -> "empty":
+        return self
+
+    def __deepcopy__(self, memo) -> "empty":
+        return self
+
 
 class piece(object):
-    "Piece square on board"
-
-    def __init__(self, color, name: PIECENAME, hasMoved=False):
-        assert color in ["b", "w"], "Invalid color"
-        assert name in ["K", "Q", "B", "N", "R", "P"], "Invalid name"
-        self.color: Literal["w", "b"] = color
-        self.name: PIECENAME = name
-        self.hasMoved: bool = hasMoved
-        self.value: int
-        if name == "K":
-            self.value = 100
-        elif name == "Q":
-            self.value = 9
-        elif name == "R":
-            self.value = 5
-        elif name == "B":
-            self.value = 3
-        elif name == "N":
-            self.value = 3
-        elif name == "P":
-            self.value = 1
+    """Piece square on board. Immutable and interned: there is one object per color, name and hasMoved,
+    which every board holding that piece shares. Make a moved piece with piece(color, name, hasMoved=True)
+    rather than changing one in place. Castling rights are kept on the position, hasMoved is only for display
+    and the board string encoding.
+    """
+
+    __slots__ = ("color", "name", "hasMoved", "value")
+    _interned: dict[tuple[str, str, bool], "piece"] = {}
+
+    def __new__(cls, color: Literal["w", "b"], name: PIECENAME, hasMoved: bool = False):
+        key = (color, name, hasMoved)
+        p = cls._interned.get(key)
+        if p is None:
+            assert color in ["b", "w"], "Invalid color"
+            assert name in ["K", "Q", "B", "N", "R", "P"], "Invalid name"
+            p = super().__new__(cls)
+            object.__setattr__(p, "color", color)
+            object.__setattr__(p, "name", name)
+            object.__setattr__(p, "hasMoved", bool(hasMoved))
+            object.__setattr__(p, "value", PIECEVALUES[name])
+            cls._interned[key] = p
+        return p
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Pieces are immutable, use piece(color, name, hasMoved) instead")
 
     def __repr__(self):
         return self.color + self.name
 
+    def __reduce__(self):
+        return (piece, (self.color, self.name, self.hasMoved))
 
-# %%
-# class attackDictContents(TypedDict):
-#     w: list[int]
-#     b: list[int]
-#     value: int
-#     pieceColor: str | None
+    def __copy__(self) -> "piece":
+        return self
+
+    def __deepcopy__(self, memo) -> "piece":
+        return self
+
+
+EMPTY = empty()
 
 
 # %% Database encoding functions
@@ -267,8 +349,8 @@ def square2Str(squareObj: empty | piece) -> str:
 
 def str2Square(s: str) -> empty | piece:
     "Parses a str to get a square object (empty or piece)"
-    if len(s) == 2:  # If empty square, init empty
-        return empty()
+    if len(s) == 2:  # If empty square, the shared empty
+        return EMPTY
     else:  # If there is something
         assert len(s) == 5, "should only be 5 characters for encoding a piece"
         return piece(color=s[2], name=s[3], hasMoved=s[4] == "T")  # type: ignore
@@ -315,6 +397,146 @@ def str2Boards(s: str) -> List[dict]:
     return [str2Board(b) for b in s.split(",")]
 
 
+# %% Bitboard conversion
+SPECIAL2FLAG: dict[str | None, int] = {
+    None: FLAGNONE,
+    "enpassant": FLAGENPASSANT,
+    "shortCastle": FLAGSHORTCASTLE,
+    "longCastle": FLAGLONGCASTLE,
+}
+STARTSQUARES = position.startPosition().squares
+
+
+def board2Position(board: dict[str, empty | piece], toMove: Literal["w", "b"], prevMoves: List[moveDict]) -> position:
+    """Converts a dict board into a bitboard position.
+
+    Args:
+
+        board (dict) -- keys are squares, values are pieces or empty
+
+        toMove (str) -- w or b
+
+        prevMoves (list of dict) -- previous moves in game to-date (for enpassant)
+
+    Returns:
+
+        position -- castling rights come from hasMoved of kings and rooks on their home squares.
+            Raises ValueError unless each side has exactly one king.
+    """
+    pos = position()
+    for s, p in board.items():
+        if isinstance(p, empty):
+            continue
+        pos.putPiece(COLORNAMES.index(p.color) * 6 + PIECENAMES.index(p.name), SQUAREINDEX[s])
+    for color in (WHITE, BLACK):
+        kings = pos.pieces[color * 6 + KING].bit_count()
+        if kings != 1:
+            raise ValueError(f"Expected one king for {COLORNAMES[color]}, found {kings}")
+    pos.toMove = WHITE if toMove == "w" else BLACK
+
+    # Castling rights - king and rook unmoved on home squares
+    for color, rank, shortRight, longRight in (("w", "1", CASTLEWK, CASTLEWQ), ("b", "8", CASTLEBK, CASTLEBQ)):
+        king = board["e" + rank]
+        if not isinstance(king, piece) or str(king) != color + "K" or king.hasMoved:
+            continue
+        for rookFile, right in (("h", shortRight), ("a", longRight)):
+            rook = board[rookFile + rank]
+            if isinstance(rook, piece) and str(rook) == color + "R" and not rook.hasMoved:
+                pos.castling |= right
+
+    # En passant - previous move was a pawn moving two squares, and a pawn is there to take it
+    if len(prevMoves) > 0:
+        prevMove = prevMoves[-1]
+        if prevMove["piece"][1] == "P" and abs(int(prevMove["newSquare"][1]) - int(prevMove["oldSquare"][1])) == 2:
+            epSquare = (SQUAREINDEX[prevMove["oldSquare"]] + SQUAREINDEX[prevMove["newSquare"]]) >> 1
+            if PAWNATTACKS[pos.toMove ^ 1][epSquare] & pos.pieces[pos.toMove * 6 + PAWN]:
+                pos.epSquare = epSquare
+
+    pos.key = pos.computeKey()
+    return pos
+
+
+def position2Board(pos: position) -> dict[str, empty | piece]:
+    """Converts a bitboard position into a dict board.
+    hasMoved is derived: kings and rooks from castling rights, other pieces from being off their start square.
+    A position has no history, so a piece that left its start square and came back gets hasMoved=False, unlike on
+    the board of the game that played it, and board2Str of the result can differ from a row stored from that board.
+    Prefer the game's own board wherever one exists.
+    """
+    rookRights = {0: CASTLEWQ, 7: CASTLEWK, 56: CASTLEBQ, 63: CASTLEBK}
+    board: dict[str, empty | piece] = {s: EMPTY for s in SQUARES}
+    for sq, p in enumerate(pos.squares):
+        if p == NOPIECE:
+            continue
+        color = COLORNAMES[p // 6]
+        pieceType = p % 6
+        if pieceType == KING:
+            hasMoved = not pos.castling & [CASTLEWK | CASTLEWQ, CASTLEBK | CASTLEBQ][p // 6]
+        elif pieceType == ROOK:
+            hasMoved = not pos.castling & rookRights.get(sq, 0)
+        else:
+            hasMoved = STARTSQUARES[sq] != p
+        board[SQUARENAMES[sq]] = piece(color, PIECENAMES[pieceType], hasMoved=hasMoved)  # type: ignore
+    return board
+
+
+def moveInt2Dict(pos: position, m: int) -> moveDict:
+    "Decodes a bitboard move int (legal in pos) into a move dict"
+    fr = m & 63
+    p = pos.squares[fr]
+    promoteTo = (m >> 12) & 7
+    flag = m >> 15
+    if promoteTo:
+        special: str | None = f"promote{PIECENAMES[promoteTo]}"
+    elif flag == FLAGENPASSANT:
+        special = "enpassant"
+    elif flag == FLAGSHORTCASTLE:
+        special = "shortCastle"
+    elif flag == FLAGLONGCASTLE:
+        special = "longCastle"
+    else:
+        special = None
+    return {
+        "piece": COLORNAMES[p // 6] + PIECENAMES[p % 6],
+        "oldSquare": SQUARENAMES[fr],
+        "newSquare": SQUARENAMES[(m >> 6) & 63],
+        "special": special,
+    }
+
+
+def moveDict2Int(move: moveDict) -> int:
+    "Encodes a move dict into a bitboard move int"
+    special = move["special"]
+    if special is not None and special.startswith("promote"):
+        return encodeMove(SQUAREINDEX[move["oldSquare"]], SQUAREINDEX[move["newSquare"]], PIECENAMES.index(special[-1]))
+    return encodeMove(SQUAREINDEX[move["oldSquare"]], SQUAREINDEX[move["newSquare"]], flag=SPECIAL2FLAG[special])
+
+
+# %% Compact board encoding
+def board2Bytes(board: dict[str, empty | piece], toMove: Literal["w", "b"], prevMoves: List[moveDict]) -> bytes:
+    """Encodes a board into boardCodec.BOARDBYTES bytes for storage in db, about a tenth of board2Str.
+    Keeps castling rights and en passant (from prevMoves) rather than hasMoved of every piece.
+    """
+    return encodePosition(board2Position(board, toMove, prevMoves))
+
+
+def bytes2Board(b: bytes) -> Tuple[dict[str, empty | piece], Literal["w", "b"]]:
+    "Decodes a board from board2Bytes, returning it with the color to move"
+    pos = decodePosition(b)
+    return position2Board(pos), pos.colorToMove
+
+
+def boards2Bytes(boards: List[dict], toMove: Literal["w", "b"], moves: List[moveDict]) -> bytes:
+    "Encodes the boards reached by each of moves (e.g. validBoards) as one blob, toMove being the color to move next"
+    return b"".join(board2Bytes(b, toMove, [m]) for b, m in zip(boards, moves))
+
+
+def bytes2Boards(b: bytes) -> List[dict]:
+    if len(b) == 0:
+        return []
+    return [position2Board(pos) for pos in decodePositions(b)]
+
+
 # %% Functions
 def isLastRank(color: Literal["w", "b"], s: str) -> bool:
     "Is square s the last rank aka promotion time?"
@@ -435,41 +657,23 @@ class attackableSquares(TypedDict):
 
 
 def getSquareDict() -> dict[str, attackableSquares]:
-    """Get a dict of all the attack squares from every square, based on piece on that square."""
+    """Get a dict of all the attack squares from every square, based on piece on that square.
+    Built from the integer attack tables, so no square name math is needed.
+    """
+
+    def names(squares: list[int]) -> list[str]:
+        return [SQUARENAMES[sq] for sq in squares]
+
     squareDict: dict[str, attackableSquares] = {}
     for square in SQUARES:
-        straights = [
-            getLineFrom(
-                color="w",
-                loc=square,
-                rankIncrement=i * mult,
-                fileIncrement=j * mult,
-            )
-            for i, j in zip([0, 1], [1, 0])
-            for mult in [-1, 1]
-        ]
-        diagonals = [
-            getLineFrom(
-                color="w",
-                loc=square,
-                rankIncrement=i,
-                fileIncrement=j,
-            )
-            for i in [-1, 1]
-            for j in [-1, 1]
-        ]
-        wP = [getLineFrom(color="w", loc=square, rankIncrement=1, fileIncrement=i) for i in [-1, 1]]
-        bP = [getLineFrom(color="b", loc=square, rankIncrement=1, fileIncrement=i) for i in [-1, 1]]
-        kings = [
-            getLineFrom(color="w", loc=square, rankIncrement=i, fileIncrement=j) for i in [-1, 0, 1] for j in [-1, 0, 1]
-        ]
+        sq = SQUAREINDEX[square]
         squareDict[square] = {
-            "straights": [s for s in straights if len(s) > 0],
-            "diagonals": [d for d in diagonals if len(d) > 0],
-            "knights": getKnightAttackSquares(square),
-            "wP": [s[0] for s in wP if len(s) > 0],
-            "bP": [s[0] for s in bP if len(s) > 0],
-            "kings": [s[0] for s in kings if len(s) > 0 and s[0] != square],
+            "straights": [names(RAYSQUARES[d][sq]) for d in ROOKRAYS if len(RAYSQUARES[d][sq]) > 0],
+            "diagonals": [names(RAYSQUARES[d][sq]) for d in BISHOPRAYS if len(RAYSQUARES[d][sq]) > 0],
+            "knights": names(bbSquares(KNIGHTATTACKS[sq])),
+            "wP": names(bbSquares(PAWNATTACKS[WHITE][sq])),
+            "bP": names(bbSquares(PAWNATTACKS[BLACK][sq])),
+            "kings": names(bbSquares(KINGATTACKS[sq])),
         }
 
     return squareDict
@@ -493,62 +697,7 @@ def isInCheck(board: dict[str, empty | piece], color: Literal["w", "b"]) -> bool
 
         bool -- is color in check in board?
     """
-    global SQUAREDICT
-
-    # Get king square
-    otherColor = getOtherColor(color)
-    k = getKingSquare(board, color)
-
-    # If a pawn is on a previous rank and adjacent file, return yes
-    pawnAttackSquares = [getRelativeLoc(color, k, 1, _) for _ in [1, -1] if getRelativeLoc(color, k, 1, _) in SQUARES]
-    for s in pawnAttackSquares:
-        if s is None:
-            continue
-        if str(board[s]) == otherColor + "P":
-            return True
-
-    # Knights being 2,1 or 1,2 +/- on both away means check
-    knightAttackSquares = SQUAREDICT[k]["knights"]
-    for s in knightAttackSquares:
-        if str(board[s]) == otherColor + "N":
-            return True
-
-    # Check that closest diagonal piece isn't bishop or Queen or king
-    diagonals = SQUAREDICT[k]["diagonals"]
-    for diag in diagonals:
-        for s in diag:
-            if type(board[s]) == empty:
-                pass
-            elif str(board[s])[0] == color:
-                break
-            elif str(board[s]) in [otherColor + "Q", otherColor + "B"]:
-                return True
-            else:
-                break
-
-    # Check that closest straight line piece isn't rook or Queen
-    straights = SQUAREDICT[k]["straights"]
-    for straight in straights:
-        for s in straight:
-            if type(board[s]) == empty:
-                pass
-            elif str(board[s])[0] == color:
-                break
-            elif str(board[s]) in [otherColor + "Q", otherColor + "R"]:
-                return True
-            else:
-                break
-
-    # Check that nearest piece in square around given piece isn't other king
-    for line in straights + diagonals:
-        if len(line) == 0:
-            continue
-        elif type(line[0]) == empty:
-            pass
-        elif str(board[line[0]]) == otherColor + "K":
-            return True
-
-    return False
+    return board2Position(board, color, []).inCheck()
 
 
 def getPotentialValidMoves(
@@ -805,39 +954,31 @@ def getNewBoard(board: dict, move: dict) -> dict:
         raise MoveError("Specified move does not have all required elements")
 
     newBoard = board.copy()
-    movingPiece = deepcopy(board[move["oldSquare"]])
-    movingPiece.hasMoved = True
-    movingColor = movingPiece.color
-
-    if move["piece"] != str(movingPiece):
+    movingPiece = board[move["oldSquare"]]
+    if not isinstance(movingPiece, piece) or move["piece"] != str(movingPiece):
         raise MoveError(f"Square {move['oldSquare']} does not have piece {move['piece']}")
-    newBoard[move["newSquare"]] = movingPiece
-    newBoard[move["oldSquare"]] = empty()
+    movingColor = movingPiece.color
+    newBoard[move["newSquare"]] = piece(movingColor, movingPiece.name, hasMoved=True)
+    newBoard[move["oldSquare"]] = EMPTY
 
     # Promotion Logic - create new piece in location
     if move["special"] in [f"promote{p}" for p in ["Q", "N", "R", "B"]]:
         newBoard[move["newSquare"]] = piece(movingColor, move["special"][-1], hasMoved=True)
 
     if move["special"] == "enpassant":
-        newBoard[getRelativeLoc(movingColor, move["newSquare"], -1, 0)] = empty()
+        newBoard[getRelativeLoc(movingColor, move["newSquare"], -1, 0)] = EMPTY
     if move["special"] == "shortCastle":
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, -1)] = deepcopy(
-            newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)]
-        )
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, -1)].hasMoved = True
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)] = empty()
+        newBoard[getRelativeLoc("w", move["newSquare"], 0, -1)] = piece(movingColor, "R", hasMoved=True)
+        newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)] = EMPTY
     if move["special"] == "longCastle":
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)] = deepcopy(
-            newBoard[getRelativeLoc("w", move["newSquare"], 0, -2)]
-        )
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)].hasMoved = True
-        newBoard[getRelativeLoc("w", move["newSquare"], 0, -2)] = empty()
+        newBoard[getRelativeLoc("w", move["newSquare"], 0, 1)] = piece(movingColor, "R", hasMoved=True)
+        newBoard[getRelativeLoc("w", move["newSquare"], 0, -2)] = EMPTY
 
     return newBoard
 
 
 def getValidMoves(
-    board: dict[str, empty | piece], color: Literal["w", "b"], prevMoves: List[moveDict]
+    board: dict[str, empty | piece], color: Literal["w", "b"], prevMoves: List[moveDict], movesOnly: bool = False
 ) -> Tuple[list[moveDict], dict[str, dict[str, empty | piece]]]:
     """Gets all valid moves for a specific color. If list length = 0, checkmate!
 
@@ -849,50 +990,242 @@ def getValidMoves(
 
         prevMoves (list of dict) -- previous moves in game to-date (for enpassant)
 
+        movesOnly (bool) -- skip building the resulting boards. Defaults to False.
+
     Returns:
 
         tuple of list, dict -- list of valid moves with keys piece, oldSquare, newSquare, special
-            and dict of boards after executing said move. Key for the dict is str(move)
+            and dict of boards after executing said move. Key for the dict is str(move).
+            The dict is empty if movesOnly.
 
     """
 
-    potentialValidMoves = []
-    validMoves = []
-    validBoards = {}
+    return getPositionMoves(board2Position(board, color, prevMoves), board, movesOnly)
 
-    # Loop through squares, if square has same-color piece, save potential valid moves
-    for currSquare in board:
-        if type(board[currSquare]) == empty:
-            continue
 
-        movingPiece = board[currSquare]
-        if str(movingPiece)[0] != color:
-            continue
+def getPositionMoves(
+    pos: position, board: dict[str, empty | piece], movesOnly: bool = False
+) -> Tuple[list[moveDict], dict[str, dict[str, empty | piece]]]:
+    """Gets all valid moves for the side to move in pos, and the dict boards that result from them.
 
-        potentialValidMoves += getPotentialValidMoves(board, currSquare, prevMoves)
-    # See if potential move results in check, if not, save move and board
-    for move in potentialValidMoves:
-        newBoard = getNewBoard(board, move)
-        if isInCheck(newBoard, color):
-            continue
+    Args:
+
+        pos (position) -- bitboard position, used for move generation
+
+        board (dict) -- the same position as a dict board, used to build the resulting boards
+
+        movesOnly (bool) -- skip building the resulting boards. Defaults to False.
+
+    Returns:
 
-        validMoves.append(move)
-        validBoards[move2Str(move)] = newBoard
+        tuple of list, dict -- same as getValidMoves. Moves come from MOVECACHE.
+    """
+    validMoves = MOVECACHE.validMoves(pos, board=board)
+    validBoards = {}
+    if not movesOnly:
+        for move in validMoves:
+            validBoards[move2Str(move)] = getNewBoard(board, move)
 
     return validMoves, validBoards
 
 
+# %% Move generation cache
+class moveCache(object):
+    """Legal moves per position, keyed by Zobrist hash, so positions that recur across games (openings, common
+    middlegames) are generated once. Moves are kept as packed move ints, a few hundred bytes a position, and only
+    made into move dicts when read. In memory only unless given a dbPath or enablePersistence is called, then backed
+    by the boards table: the hotPositions most hit positions are bulk loaded on first use, and new positions are
+    written back batchSize at a time.
+
+    Args:
+
+        dbPath (str) -- database to persist to, see createBoardsTable. Defaults to None (in memory only).
+
+        hotPositions (int) -- positions with the most hits to load on first use, up to half of maxMb.
+            Defaults to 100,000.
+
+        batchSize (int) -- new positions buffered before writing them back. Defaults to 1,000.
+
+        maxMb (float) -- memory budget of the entries, in megabytes. Beyond it the positions added since loading are
+            written back and dropped, the loaded ones stay. Defaults to MOVECACHEMB.
+    """
+
+    def __init__(
+        self,
+        dbPath: Union[str, None] = None,
+        hotPositions: int = 100_000,
+        batchSize: int = 1_000,
+        maxMb: float = MOVECACHEMB,
+    ):
+        self.dbPath = dbPath
+        self.hotPositions = hotPositions
+        self.batchSize = batchSize
+        self.maxBytes = int(maxMb * (1 << 20))
+        self.entries: dict[int, Union[array, str]] = {}  # Loaded ones stay as validMovesStr until used
+        self.bytes = 0  # Estimated size of entries, see _entryBytes
+        self.hot: set[int] = set()  # Keys loaded from the table, never evicted
+        self.pending: dict[int, tuple] = {}  # New rows for the boards table
+        self.hitCounts: dict[int, int] = defaultdict(int)  # Hits since the last write back
+        self.loaded = False
+        self.flushAtExit = False
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return (
+            f"moveCache(entries={len(self.entries)}, mb={self.bytes / (1 << 20):.1f}, hits={self.hits}, "
+            f"misses={self.misses})"
+        )
+
+    @staticmethod
+    def _entryBytes(entry: Union[array, str]) -> int:
+        "Memory an entry holds: the moves, its key and its slot in the dict"
+        return sys.getsizeof(entry) + MOVECACHEENTRYOVERHEAD
+
+    @property
+    def persistent(self) -> bool:
+        return self.dbPath is not None
+
+    def enablePersistence(self, dbPath: Union[str, None] = None) -> None:
+        """Backs the cache with the boards table of dbPath from the next lookup on, creating or migrating the table
+        if needed. Pending positions are written back at exit.
+
+        Args:
+
+            dbPath (str) -- database to persist to. Defaults to None (DBPATH).
+        """
+        self.clear()
+        self.dbPath = dbPath or DBPATH
+
+    def load(self) -> None:
+        "Bulk loads the most hit positions from the boards table, creating or migrating it first if needed"
+        self.loaded = True
+        if self.dbPath is None:
+            return
+        createBoardsTable(self.dbPath)
+        if not self.flushAtExit:
+            atexit.register(self.flush)
+            self.flushAtExit = True
+        with sqlite3.connect(self.dbPath) as con:
+            cur = con.execute(
+                "select positionKey, validMovesStr from boards order by hits desc limit ?", (self.hotPositions,)
+            )
+            for key, validMovesStr in cur:
+                entry = validMovesStr or ""
+                if self.bytes + self._entryBytes(entry) > self.maxBytes // 2:
+                    break
+                self.entries[key % (1 << 64)] = entry
+                self.bytes += self._entryBytes(entry)
+        con.close()
+        self.hot = set(self.entries)
+        log.info(f"Loaded {len(self.entries)} positions into the move cache")
+
+    def validMoves(
+        self,
+        pos: position,
+        legalMoves: Union[List[int], None] = None,
+        board: Union[dict[str, empty | piece], None] = None,
+    ) -> List[moveDict]:
+        """Returns the legal moves of pos as move dicts, generating and caching them if pos is new.
+
+        Args:
+
+            pos (position) -- position to look up
+
+            legalMoves (list of int) -- legal moves of pos, if already generated. Defaults to None.
+
+            board (dict) -- pos as the dict board it was played to, so a new row keeps each piece's real hasMoved.
+                Defaults to None (position2Board, which can only derive hasMoved).
+
+        Returns:
+
+            list of dict -- new list and dicts on every call, free to change without touching the cache
+        """
+        if not self.loaded:
+            self.load()
+        key = pos.key
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            if self.persistent:
+                self.hitCounts[key] += 1
+            if isinstance(cached, str):
+                packed = array("I", (moveDict2Int(m) for m in str2Moves(cached)) if cached else ())
+                self.bytes += self._entryBytes(packed) - self._entryBytes(cached)
+                cached = self.entries[key] = packed
+            return [moveInt2Dict(pos, m) for m in cached]
+
+        self.misses += 1
+        packed = array("I", pos.legalMoves() if legalMoves is None else legalMoves)
+        moves = [moveInt2Dict(pos, m) for m in packed]
+        if self.bytes + self._entryBytes(packed) > self.maxBytes:
+            self.flush()
+            self.entries = {k: v for k, v in self.entries.items() if k in self.hot}
+            self.bytes = sum(self._entryBytes(v) for v in self.entries.values())
+        self.entries[key] = packed
+        self.bytes += self._entryBytes(packed)
+        if self.persistent:
+            boardStr = board2Str(board if board is not None else position2Board(pos))
+            self.pending[key] = (signedKey(key), boardStr, pos.colorToMove, moves2Str(moves))
+            if len(self.pending) >= self.batchSize:
+                self.flush()
+        return moves
+
+    def flush(self) -> None:
+        "Writes new positions and hit counts back to the boards table in one transaction"
+        if not self.persistent or not (self.pending or self.hitCounts):
+            return
+        with sqlite3.connect(self.dbPath) as con:
+            con.executemany(
+                "insert or ignore into boards (positionKey, boardStr, toMove, validMovesStr) values (?, ?, ?, ?)",
+                list(self.pending.values()),
+            )
+            con.executemany(
+                "update boards set hits = hits + ? where positionKey = ?",
+                [(n, signedKey(key)) for key, n in self.hitCounts.items()],
+            )
+        con.close()
+        self.pending.clear()
+        self.hitCounts.clear()
+
+    def clear(self) -> None:
+        "Writes back and empties the in memory cache, which loads again on next use"
+        self.flush()
+        self.entries.clear()
+        self.bytes = 0
+        self.hot.clear()
+        self.loaded = False
+
+
+MOVECACHE = moveCache()  # In memory only, see moveCache.enablePersistence
+
+
+# %% Searcher
+def getSearcher() -> searcher:
+    "Returns the searcher shared by chessClasses, creating it and its TTSIZEMB transposition table on first use"
+    global SEARCHER
+    if SEARCHER is None:
+        SEARCHER = searcher(transpositionTable(TTSIZEMB, policy="depth"))
+    return SEARCHER
+
+
 # %% Score board
-def getBoardValue(board: dict[str, empty | piece]) -> int:
-    """Returns a score of the board from white's perspective. Positive is good for white, negative is good for black.
+def getBoardValue(board: dict[str, empty | piece], toMove: Union[Literal["w", "b"], None] = None) -> int:
+    """Returns material score of the board from white's perspective. Positive is good for white, negative for black.
+    For search, prefer evaluation.evaluate on a position, which is incremental and includes piece-square scores.
 
     Args:
 
         board (dict) -- keys are squares, values are pieces
 
+        toMove (str) -- w or b. If given, score is from this color's perspective instead. Defaults to None.
+
     Returns:
 
-        float -- score of board for specified color
+        int -- score of board
     """
 
     boardValue = 0
@@ -904,6 +1237,8 @@ def getBoardValue(board: dict[str, empty | piece]) -> int:
         else:
             boardValue -= piece.value
 
+    if toMove == "b":
+        return -boardValue
     return boardValue
 
 
@@ -915,135 +1250,47 @@ def getMoveScore(
     currDepth: int,
     maxDepth: int = 0,
 ) -> int:
-    "Recursively"
-
-    # if at max depth, return the value
-    if currDepth == maxDepth:
-        log.debug(f"At max depth of {maxDepth}, returning board value")
-        return getBoardValue(board, toMove)
-
-    # Otherwise, recurse down across all the moves
-    validMoves, validBoards = getValidMoves(board, toMove, prevMoves)
-    moveVals = []
-    for move in validMoves:
-        score = getMoveScore(
-            validBoards[move2Str(move)],
-            originalToMove,
-            getOtherColor(toMove),
-            prevMoves + [move],
-            currDepth + 1,
-            maxDepth,
-        )
-        log.debug(f"Evaluating move {move2Str(move)} at level {currDepth}, score: {score}")
-        moveVals.append(score)
-    return max(moveVals)
+    """Returns the score of board in centipawns from a negamax alpha-beta search of maxDepth - currDepth plies.
+
+    Args:
+
+        board (dict) -- keys are squares, values are pieces
 
-    # raise ValueError("Shouldnt reach here")
+        originalToMove (str) -- w or b, the perspective of the returned score. Positive is good for this color.
 
+        toMove (str) -- w or b, the color to move in board
 
-# @log.timeFuncInfo
-def getScore(
-    board: dict[str, empty | piece], toMove: Literal["w", "b"], prevMoves: list[moveDict]
-) -> tuple[pd.DataFrame, int]:
-    """Gets score of a board. Returns everything where the perspective of 'toMove' is positive.
+        prevMoves (list of dict) -- previous moves in game to-date. Only the last is used, for en passant:
+            the search starts from board alone, so it does not see repetitions of positions earlier in the game.
+
+        currDepth (int) -- depth of board below the root
+
+        maxDepth (int) -- depth to search to. Defaults to 0.
+
+    Returns:
 
-    E.g.:
+        int -- score of board for originalToMove
     """
+    pos = board2Position(board, toMove, prevMoves)
+    if currDepth >= maxDepth:
+        score = evaluate(pos)
+    else:
+        score = getSearcher().search(pos, depth=maxDepth - currDepth)["score"]
+    return score if toMove == originalToMove else -score
+
+
+# @log.timeFuncInfo
+def getScore(board: dict[str, empty | piece], toMove: Literal["w", "b"], prevMoves: list[moveDict]) -> int:
+    """Gets score of a board in centipawns. Positive is good for toMove.
+    Captures and promotions are played out by quiescence search until the position is quiet, skipping
+    captures that lose material by static exchange evaluation, so hanging pieces are valued correctly.
+    """
+    return getSearcher().quiesce(board2Position(board, toMove, prevMoves))
+
 
-    # TODO how to handle split attacks (e.g. knight shouldn't get both)
-    scores = pd.DataFrame(index=[x for x in reversed(RANKS)], columns=FILES, data=0)
-    # boardWithColor = f"{getOtherColor(toMove)} | {board2Str(board)}"
-    log.debug(f"toMove: {toMove}")
-    # For any opponent color piece with >1 attack on it:
-    # Value for me = +(value of piece under attack)
-    #   - (value of n lowest pieces attacking it for n number defending)
-    #  + (value of m lowest pieces defending it for m-1 number attacking)
-
-    # Example, N attacking Q defended by P
-    #   +9 - [3] + 0 = +6
-
-    # Example NPB attacking P defended by NP
-    #  +1 - [1, 3] + [3 + 1] = +1
-    validMoves, validBoards = getValidMoves(board, toMove, prevMoves)
-    for move in validMoves:
-        newBoard = validBoards[move2Str(move)]
-        score = getBoardValue(newBoard, toMove)
-        log.debug(f"move: {move}, score: {score}")
-
-    # # Handle checks - if is in check, only allow moves that get out of check
-    # if isInCheck(board, toMove):
-    #     log.debug(f"{toMove} is in check, only considering {len(validMoves)} valid moves")
-    #     if len(validMoves) == 0:
-    #         for col in scores.columns:
-    #             scores[col] = 10
-    #         return scores, 1000
-
-    # attackDict: dict[str, attackDictContents] = defaultdict(
-    #     lambda: {"w": [], "b": [], "value": 0, "pieceColor": None}
-    # )
-    # pieceValuesOnBoard = {"w": 0, "b": 0}
-    # for square, p in board.items():
-    #     if isinstance(p, empty):
-    #         continue
-    #     pieceValuesOnBoard[p.color] += p.value
-    #     attackDict[square]["value"] = p.value
-    #     attackDict[square]["pieceColor"] = p.color
-    #     if p.name == "P":
-    #         for sq in SQUAREDICT[square][str(p)]:
-    #             attackDict[sq][p.color].append(p.value)
-    #     elif p.name == "N":
-    #         for sq in SQUAREDICT[square]["knights"]:
-    #             attackDict[sq][p.color].append(p.value)
-
-    #     elif p.name == "B":
-    #         for line in SQUAREDICT[square]["diagonals"]:
-    #             for sq in line:
-    #                 attackDict[sq][p.color].append(p.value)
-    #                 if isinstance(board[sq], type(p)):
-    #                     break
-    #     elif p.name == "R":
-    #         for line in SQUAREDICT[square]["straights"]:
-    #             for sq in line:
-    #                 attackDict[sq][p.color].append(p.value)
-    #                 if isinstance(board[sq], type(p)):
-    #                     break
-    #     elif p.name == "Q":
-    #         for line in SQUAREDICT[square]["diagonals"] + SQUAREDICT[square]["straights"]:
-    #             for sq in line:
-    #                 attackDict[sq][p.color].append(p.value)
-    #                 if isinstance(board[sq], type(p)):
-    #                     break
-    #     elif p.name == "K":
-    #         for sq in SQUAREDICT[square]["kings"]:
-    #             attackDict[sq][p.color].append(p.value)
-
-    # for square, stuff in attackDict.items():
-    #     if stuff["value"] == 0:
-    #         continue
-    #     if (len(stuff["w"]) == 0) & (len(stuff["b"]) == 0):
-    #         continue
-    #     if stuff["pieceColor"] == toMove:
-    #         continue
-    #     attacks = sorted(stuff[toMove])
-    #     defends = sorted(stuff[getOtherColor(toMove)])
-    #     attackCnt = len(attacks)
-    #     defendCnt = len(defends)
-    #     if attackCnt == 0:
-    #         continue
-    #     log.debug(f"{square}, {stuff}")
-    #     log.debug(f"attacks: {attacks}, defends: {defends}")
-    #     nv = stuff["value"] - sum(attacks[:defendCnt]) + sum(defends[: attackCnt - 1])
-    #     log.debug(f"nv: {nv}")
-    #     if (nv > 0) or (defendCnt == 0):
-    #         scores[square[0]][square[1]] += stuff["value"]
-    #         log.debug(f"{square} value {stuff['value']} attacks: {attacks}, defends: {defends}, net: {nv}")
-
-    # log.debug(pieceValuesOnBoard)
-
-    # boardVal = pieceValuesOnBoard[toMove] - pieceValuesOnBoard[getOtherColor(toMove)]
-
-    # return scores, boardVal
-    return scores, 0
+def loadFenGames(fp: str, limit: Union[int, None] = None) -> List["chessGame"]:
+    "Starts a chessGame at every position in a FEN or EPD file, see bitboard.loadFenFile for the format"
+    return [chessGame.fromPosition(pos) for pos in loadFenFile(fp, limit)]
 
 
 # %% Chess game class
@@ -1055,7 +1302,7 @@ class chessGame(object):
         self.board: dict[str, empty | piece] = {}
         for f in FILES:
             for r in RANKS:
-                self.board[f + r] = empty()
+                self.board[f + r] = EMPTY
         for r, color in (["1", "w"], ["8", "b"]):
             for _ in ["a" + r, "h" + r]:
                 self.board[_] = piece(color, "R")
@@ -1073,9 +1320,104 @@ class chessGame(object):
         self.toMove: Literal["w", "b"] = "w"
         self.waiting: Literal["w", "b"] = "b"
         self.prevMoves: list[moveDict] = []
-        self.validMoves, self.validBoards = getValidMoves(self.board, self.toMove, self.prevMoves)
+        self.position: position = board2Position(self.board, self.toMove, self.prevMoves)
+        self._clearMoves()
         self.winner = None
 
+    @classmethod
+    def fromFen(cls, fen: str) -> "chessGame":
+        """Starts a game from a position in Forsyth-Edwards Notation, without replaying the moves that led to it.
+        See fromPosition.
+
+        Args:
+
+            fen (str) -- e.g. rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1
+
+        Returns:
+
+            chessGame -- positioned at fen
+        """
+        return cls.fromPosition(position.fromFen(fen))
+
+    @classmethod
+    def fromPosition(cls, pos: position) -> "chessGame":
+        """Starts a game from a bitboard position, without replaying the moves that led to it.
+        If the position has an en passant square, the pawn's double move is put in prevMoves so the dict-board
+        functions see it too.
+
+        Args:
+
+            pos (position) -- position to start from. The game takes it over rather than copying it.
+
+        Returns:
+
+            chessGame -- positioned at pos
+        """
+        game = cls.__new__(cls)
+        game.position = pos
+        game.board = position2Board(pos)
+        game.toMove = pos.colorToMove
+        game.waiting = getOtherColor(game.toMove)
+        game.prevMoves = []
+        if pos.epSquare >= 0:
+            epSquare = pos.epSquare
+            forward = 8 if game.toMove == "b" else -8  # Direction the waiting side's pawns move
+            game.prevMoves.append(
+                {
+                    "piece": game.waiting + "P",
+                    "oldSquare": SQUARENAMES[epSquare - forward],
+                    "newSquare": SQUARENAMES[epSquare + forward],
+                    "special": None,
+                }
+            )
+        game._clearMoves()
+        game.winner = game.waiting if len(game.legalMoves) == 0 else None
+        return game
+
+    def toFen(self) -> str:
+        "Returns the current position in Forsyth-Edwards Notation"
+        return self.position.toFen()
+
+    # Valid moves are worked out on first use and cached until the next move
+    def _clearMoves(self) -> None:
+        self._legalMoves: Union[list[int], None] = None
+        self._validMoves: Union[list[moveDict], None] = None
+        self._validBoards: Union[dict[str, dict[str, empty | piece]], None] = None
+        self._moveIndex: Union[moveIndex, None] = None
+
+    @property
+    def legalMoves(self) -> list[int]:
+        "Legal moves for the side to move as bitboard move ints, see moveInt2Dict"
+        if self._legalMoves is None:
+            self._legalMoves = self.position.legalMoves()
+        return self._legalMoves
+
+    @property
+    def moveIndex(self) -> moveIndex:
+        "Legal moves indexed for lookup by piece and target square, or by origin and target square"
+        if self._moveIndex is None:
+            self._moveIndex = moveIndex(self.position, self.legalMoves)
+        return self._moveIndex
+
+    @property
+    def validMoves(self) -> list[moveDict]:
+        "Legal moves for the side to move as move dicts, from MOVECACHE"
+        if self._validMoves is None:
+            self._validMoves = MOVECACHE.validMoves(self.position, self._legalMoves, self.board)
+        return self._validMoves
+
+    @property
+    def validBoards(self) -> dict[str, dict[str, empty | piece]]:
+        "Board after each valid move, keyed by move2Str of the move"
+        if self._validBoards is None:
+            self._validBoards = {move2Str(m): getNewBoard(self.board, m) for m in self.validMoves}
+        return self._validBoards
+
+    @property
+    def key(self) -> int:
+        "64-bit Zobrist hash of the current position, including side to move, castling and en passant"
+        return self.position.key
+
     def _changeTurn(self):
         if self.toMove == "w":
             self.toMove = "b"
@@ -1110,34 +1452,68 @@ class chessGame(object):
         if movingPiece.color != self.toMove:
             raise MoveError(f"It is {self.toMove} turn")
 
-        # Get valid moves, ensure this move is in list
-        foundMoves = []
-        for m in self.validMoves:
-            if all([m[k] == potentialMove[k] for k in ["piece", "oldSquare", "newSquare"]]):
-                foundMoves.append(m.copy())
-        if len(foundMoves) == 0:
+        # Pawns only promote to a knight, bishop, rook or queen
+        if promoteTo is not None and promoteTo not in tuple(PIECENAMES[1:5]):
+            raise MoveError(f"Cannot promote to {promoteTo!r}, expected one of {', '.join(PIECENAMES[1:5])}")
+
+        # Look up the move, promotions also need the piece to promote to
+        index = self.moveIndex
+        fr, to = SQUAREINDEX[oldSquare], SQUAREINDEX[newSquare]
+        m = index.lookup(fr, to)
+        if m is None:
+            if promoteTo is not None:
+                m = index.lookup(fr, to, PIECENAMES.index(promoteTo))
+            elif index.lookup(fr, to, QUEEN) is not None:
+                raise MoveError(f"Found too many moves for {potentialMove}, specify promoteTo")
+        if m is None:
             raise MoveError(f"Invalid move {potentialMove}")
-        elif len(foundMoves) >= 2:
-            foundMoves = [m for m in foundMoves if (m["special"] == f"promote{promoteTo}")]
-            if len(foundMoves) != 1:
-                raise MoveError(f"Found too many moves {foundMoves}")
+        self._playMove(m)
+
+    def moveSan(self, san: str) -> moveDict:
+        """Execute a move given in standard algebraic notation, e.g. Nf3, exd5, e8=Q or O-O
 
-        foundMove = foundMoves[0]
+        Returns:
 
-        # Update board, change turn, save move, get next player's valid moves
-        self.board = self.validBoards[move2Str(foundMove)]
+            moveDict -- the move played
+        """
+        if self.winner is not None:
+            raise MoveError(f"Game is over, {self.winner} already won!")
+        try:
+            m = self.moveIndex.parseSan(san)
+        except ValueError as e:
+            raise MoveError(str(e))
+        return self._playMove(m)
+
+    def san(self, move: moveDict) -> str:
+        "Returns a valid move in standard algebraic notation"
+        return self.moveIndex.san(moveDict2Int(move))
+
+    def _playMove(self, m: int) -> moveDict:
+        "Plays legal move int m, returning it as a move dict"
+        foundMove = moveInt2Dict(self.position, m)
+
+        # Update board, change turn, save move. Next player's valid moves are worked out when first needed.
+        if self._validBoards is not None:
+            self.board = self._validBoards[move2Str(foundMove)]
+        else:
+            self.board = getNewBoard(self.board, foundMove)
+        self.position.makeMove(m)
         self._changeTurn()
         self.prevMoves.append(foundMove)
-        self.board[newSquare].hasMoved = True
-        self.validMoves, self.validBoards = getValidMoves(self.board, self.toMove, self.prevMoves)
+        self._clearMoves()
 
         # Handle winning scenario
-        if len(self.validMoves) == 0:
+        if len(self.legalMoves) == 0:
             self.winner = getOtherColor(self.toMove)
+        return foundMove
 
     def show(self):
-        scores, boardVal = getScore(self.board, self.toMove, self.prevMoves)
-        fig = px.imshow(scores.values, x=FILES, y=[x for x in reversed(RANKS)])
+        # Heatmap of the material the side to move wins by capturing on each square
+        gains = np.zeros((8, 8))
+        for m in self.position.legalMoves(capturesOnly=True):
+            row, col = 7 - ((m >> 6) & 63) // 8, ((m >> 6) & 63) % 8
+            gains[row, col] = max(gains[row, col], see(self.position, m))
+        fig = px.imshow(gains, x=FILES, y=[x for x in reversed(RANKS)])
         for x in range(7):
             fig.add_hline(x + 0.5, line_width=1, line_color="black")
             fig.add_vline(x + 0.5, line_width=1, line_color="black")
@@ -1160,85 +1536,147 @@ class chessGame(object):
                 sizey=0.125,
             )
 
-        netScore = (boardVal + scores.values.sum()) * ([-1, 1][self.toMove == "w"])
+        netScore = getScore(self.board, self.toMove, self.prevMoves) * ([-1, 1][self.toMove == "w"])
         # netScore *= 1 if self.toMove == "w" else -1
         fig.update_layout(
             title_text=f"Score: {netScore}, To move: {self.toMove}, Waiting: {self.waiting}, Winner: {self.winner}",
         )
         fig.show()
 
-    def recMove(self, depth=2):
-        "Recommend a move. All scores are in"
+    def search(
+        self,
+        depth: Union[int, None] = None,
+        timeMs: Union[int, None] = None,
+        workers: int = 1,
+        mode: Literal["rootSplit", "lazySmp"] = "rootSplit",
+        useBook: bool = False,
+    ) -> searchResult:
+        """Searches the current position with iterative deepening negamax alpha-beta.
+
+        Args:
+
+            depth (int) -- max depth in plies. Defaults to None (search.DEFAULTDEPTH, or unlimited if timeMs).
+
+            timeMs (int) -- time budget in milliseconds. Defaults to None (no limit).
+
+            workers (int) -- processes to search with, see parallelSearch. Defaults to 1 (this process only).
+
+            mode (str) -- how workers split the search, "rootSplit" (default) or "lazySmp"
+
+            useBook (bool) -- play from the opening book at BOOKPATH without searching, if it has the position.
+                A book move has depth 0 and score 0. Defaults to False (always search).
+
+        Returns:
+
+            searchResult -- move (int, see moveInt2Dict), score in centipawns for the side to move,
+                completed depth, principal variation, nodes and time taken
+        """
+        if self.winner is not None:
+            raise MoveError(f"Game is over, {self.winner} already won!")
+        if useBook:
+            book = getBook()
+            bookMove = book.pickMove(self.position) if book is not None else 0
+            if bookMove:
+                log.info(f"Book move {moveToUci(bookMove)}")
+                return {
+                    "move": bookMove,
+                    "score": 0,
+                    "depth": 0,
+                    "pv": [bookMove],
+                    "nodes": 0,
+                    "timeMs": 0,
+                    "cutoffs": 0,
+                    "firstMoveCutoffRate": 0.0,
+                }
+        if workers == 1:
+            result = getSearcher().search(self.position, depth=depth, timeMs=timeMs)
+        else:
+            result = parallelSearch(self.position, depth=depth, timeMs=timeMs, workers=workers, mode=mode)
+        log.info(
+            f"Search | depth {result['depth']} | score {result['score']} | pv {pv2Str(result['pv'])} | "
+            f"{result['nodes']} nodes | {result['timeMs']}ms | {result['cutoffs']} cutoffs, "
+            f"{result['firstMoveCutoffRate']:.0%} on first move"
+        )
+        return result
+
+    def recMove(
+        self, depth: Union[int, None] = 2, timeMs: Union[int, None] = None, workers: int = 1, useBook: bool = False
+    ) -> moveDict:
+        "Recommend a move, searching depth plies (or for timeMs milliseconds) with workers processes, see search"
 
         # Get valid moves, ensure there are some
         if len(self.validMoves) == 0:
             raise MoveError("No valid moves")
 
-        # Get best move
-        for move, board in zip(self.validMoves, self.validBoards.values()):
-            boardWithColor = f"{getOtherColor(self.toMove)} | {board2Str(board)}"
-            try:
-                netScore = BOARDSCORES[boardWithColor]
-            except KeyError:
-                log.debug(board2Str(board))
-                scores, boardVal = getScore(board, getOtherColor(self.toMove), self.prevMoves)
-                netScore = boardVal + scores.values.sum()
-                netScore = boardVal + scores.values.sum()  # * ([-1, 1][self.toMove == "w"])
-                BOARDSCORES[boardWithColor] = netScore
-            log.info(
-                f"From {self.toMove} persp: {move2Str(move)} results in {getOtherColor(self.toMove)} score of {netScore}"
-            )
-            # log.info(netScore)
-            # if there is a M1 (board value > 100), return that move
-            if netScore > 100:
-                return move
+        result = self.search(depth=depth, timeMs=timeMs, workers=workers, useBook=useBook)
+        return moveInt2Dict(self.position, result["move"])
+
+    def perft(self, depth: int, divide: bool = False) -> Union[int, dict[str, int]]:
+        """Counts leaf nodes of the legal move tree from the current position, to check move generation.
+
+        Args:
+
+            depth (int) -- plies to count
+
+            divide (bool) -- split the count by first move. Defaults to False.
+
+        Returns:
+
+            int -- leaf node count, or dict of long algebraic move (e.g. e2e4) to count if divide
+        """
+        start = time.perf_counter()
+        out = perftDivide(self.position, depth) if divide else perft(self.position, depth)
+        nodes = sum(out.values()) if isinstance(out, dict) else out
+        seconds = time.perf_counter() - start
+        rate = int(nodes / max(seconds, 1e-9))
+        log.info(f"Perft | depth {depth} | {nodes} nodes | {seconds:.2f}s | {rate} nodes/sec")
+        return out
 
 
 # %% Transcribe game into engine
-def findMove(move: pd.Series, validMoves: List[dict]):
-    """Gets the specified move dict from list of validMoves.
+def findMove(move: Union[pd.Series, dict], index: moveIndex) -> moveDict:
+    """Gets the specified move dict from the legal moves of the position.
 
     Args:
 
-        move (Series) -- a row from moveDf, with values for:
+        move (Series or dict) -- a row from moveDf, with values for:
             color, piece, oldFile, oldRank, take, newSquare, promoteTo, check, mate, special
 
-        validMoves (list of dict) -- a list of valid moves given board state. Dict keys are:
-            piece, oldSquare, newSquare, special
+        index (moveIndex) -- legal moves of the position, e.g. chessGame.moveIndex
     """
 
-    # Look for validmoves that match piece and newsquare
-    matches = []
-    for validMove in validMoves:
-        if all([move[f] == validMove[f] for f in ["piece", "newSquare"]]):
-            matches.append(validMove)
+    # Look up validmoves that match piece and newsquare
+    pieceCode = COLORNAMES.index(move["piece"][0]) * 6 + PIECENAMES.index(move["piece"][1])
+    matches = index.candidates(pieceCode, SQUAREINDEX[move["newSquare"]])
 
     # If move is promotion, filter to the validmoves where promotion matches
     if type(move["promoteTo"]) == str:
-        matches = [m for m in matches if m["special"] == f"promote{move['promoteTo']}"]
+        promoteTo = PIECENAMES.index(move["promoteTo"])
+        matches = [m for m in matches if (m >> 12) & 7 == promoteTo]
 
     # If exactly one matching move found, return that
     if len(matches) == 1:
-        return matches[0]
+        return moveInt2Dict(index.pos, matches[0])
 
     # If more than one match
     elif len(matches) > 1:
 
         # Handle pawn and rook takes with multiple options
         # (if notation specifies file OR rank)
+        oldSquares = {m: SQUARENAMES[m & 63] for m in matches}
         matches = [
-            m for m in matches if (m["oldSquare"][0] == move["oldFile"]) | (m["oldSquare"][1] == move["oldRank"])
+            m for m in matches if (oldSquares[m][0] == move["oldFile"]) | (oldSquares[m][1] == move["oldRank"])
         ]
         if len(matches) == 1:
-            return matches[0]
+            return moveInt2Dict(index.pos, matches[0])
         elif len(matches) == 0:
             raise MoveError(f"No matches after looking for matching rank or file")
 
         else:  # If we have more than 1 match still
             # Look for matching rank AND file
-            matches = [m for m in matches if (m["oldSquare"] == move["oldFile"] + move["oldRank"])]
+            matches = [m for m in matches if (oldSquares[m] == move["oldFile"] + move["oldRank"])]
             if len(matches) == 1:
-                return matches[0]
+                return moveInt2Dict(index.pos, matches[0])
             elif len(matches) == 0:
                 raise MoveError(f"No matches after looking for matching rank and/or file")
 
@@ -1272,6 +1710,41 @@ def movesStrIntoDf(movesStr: str) -> pd.DataFrame:
     """
     moves = movesStr.split(" ")
     moveDf = pd.DataFrame({"move": moves, "color": np.tile(["w", "b"], len(moves))[: len(moves)]})
+    return parseSanColumns(moveDf)
+
+
+def movesSeriesIntoDf(movesStrs: pd.Series) -> pd.DataFrame:
+    """Batch version of movesStrIntoDf. Parses the moves of many games in one vectorised pass,
+    rather than building and parsing a DataFrame per game.
+
+    Args:
+
+        movesStrs (Series) -- chess notation of each game's moves. The index is used as gameId.
+
+    Returns:
+
+        DataFrame -- one row per move keyed by gameId and moveNum (from 1), sorted by both,
+            then the same columns as movesStrIntoDf
+    """
+    movesStrs = movesStrs[movesStrs.fillna("").str.len() > 0]
+    moveLists = movesStrs.str.split(" ")
+    counts = moveLists.str.len().to_numpy()
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    moveDf = pd.DataFrame(
+        {
+            "gameId": np.repeat(movesStrs.index.to_numpy(), counts),
+            "moveNum": np.arange(counts.sum()) - starts + 1,
+            "move": np.concatenate(moveLists.to_numpy()) if len(moveLists) else np.array([], dtype=object),
+        }
+    )
+    moveDf["color"] = np.where(moveDf["moveNum"] % 2 == 1, "w", "b")
+    return parseSanColumns(moveDf)
+
+
+def parseSanColumns(moveDf: pd.DataFrame) -> pd.DataFrame:
+    """Splits the SAN in column move into its parts, see movesStrIntoDf. Needs columns move and color.
+    Works on any number of moves at once, from one or many games.
+    """
     moveDf[["piece", "oldFile", "oldRank", "take", "newSquare", "promoteTo", "check", "mate",]] = moveDf[
         "move"
     ].str.extract(r"([RBNKQ]{1})?([a-h])?([0-8])?(x)?([a-h][0-8])=?([RBNQ])?(\+)?(\#)?")
@@ -1298,31 +1771,50 @@ def movesStrIntoDf(movesStr: str) -> pd.DataFrame:
     return moveDf
 
 
-def parseGameRow(gameRow: pd.Series, updateEvery: int = 50):
-    if gameRow.name % updateEvery == 0:
-        log.info(f"On game {gameRow.name}")
+def replayGameRow(
+    gameRow: pd.Series, moveDf: Union[pd.DataFrame, None] = None, text: bool = True, compact: bool = False
+) -> Tuple[List[tuple], List[tuple], tuple]:
+    """Replays a game, checking every move is legal. Touches no database, so it can run in a worker process.
+
+    Args:
+
+        gameRow (Series) -- a row of the games data, with id, moves, mateColor and the games table columns
+
+        moveDf (DataFrame) -- the game's moves already parsed, e.g. its rows from movesSeriesIntoDf.
+            Defaults to None (parsed here with movesStrIntoDf).
 
-    moveDf = movesStrIntoDf(gameRow["moves"])
+        text (bool) -- make rows for the moves table. Defaults to True.
 
-    moveNums = []
-    oldBoardStr = []
-    moveStr = []
-    newBoardStr = []
+        compact (bool) -- make rows for the movesCompact table, see createCompactTables. Defaults to False.
+
+    Returns:
+
+        tuple -- rows for the moves table (gameId, moveNum, oldBoardStr, moveStr, newBoardStr),
+            rows for the movesCompact table (gameId, moveNum, moveStr, oldBoard, newBoard),
+            then the row for the games table. Either list of move rows is empty if not asked for.
+    """
+    if moveDf is None:
+        moveDf = movesStrIntoDf(gameRow["moves"])
+
+    moveRows = []
+    compactRows = []
     # Create game, iterate through moves
     game = chessGame()
-    for idx, move in moveDf.iterrows():
-        moveNums.append(idx + 1)
-        oldBoardStr.append(board2Str(game.board))
-        validMoves = game.validMoves
-        validMove = findMove(move, validMoves)
+    for idx, move in enumerate(moveDf.to_dict("records")):
+        oldBoardStr = board2Str(game.board) if text else None
+        oldBoard = encodePosition(game.position) if compact else None
+        validMove = findMove(move, game.moveIndex)
         if validMove["special"] in [f"promote{p}" for p in ["Q", "R", "N", "B"]]:
             promoteTo = validMove["special"][-1]
         else:
             promoteTo = None
 
-        moveStr.append(move2Str(validMove))
         game.move(validMove["oldSquare"], validMove["newSquare"], promoteTo)
-        newBoardStr.append(board2Str(game.board))
+        moveStr = move2Str(validMove)
+        if text:
+            moveRows.append((gameRow["id"], idx + 1, oldBoardStr, moveStr, board2Str(game.board)))
+        if compact:
+            compactRows.append((gameRow["id"], idx + 1, moveStr, oldBoard, encodePosition(game.position)))
 
     # If outcome is mate, ensure it matches the results of my engine
     if type(gameRow["mateColor"]) == str:
@@ -1330,50 +1822,382 @@ def parseGameRow(gameRow: pd.Series, updateEvery: int = 50):
             if game.winner != gameRow["mateColor"]:
                 log.info(game)
                 raise GameError(f"Engine has winner as {game.winner}, data has {gameRow['mateColor']}")
+
+    gameValues = (
+        gameRow["id"],
+        str(gameRow["rated"] == "true"),
+        int(gameRow["turns"]),
+        gameRow["winner"][0],
+        gameRow["victory_status"],
+        gameRow["increment_code"],
+        int(gameRow["white_rating"]),
+        int(gameRow["black_rating"]),
+        gameRow["moves"],
+    )
+    return moveRows, compactRows, gameValues
+
+
+def parseGameRow(gameRow: pd.Series, updateEvery: int = 50, moveDf: Union[pd.DataFrame, None] = None):
+    """Replays a game, checking every move is legal, and writes its moves and boards to the moves and games tables.
+    Moves also go to movesCompact if it exists, see ingestChunks.
+    For many games use ingestGames, which replays in parallel and writes in large transactions.
+
+    Args:
+
+        gameRow (Series) -- a row of the games data, with id, moves, mateColor and the games table columns
+
+        updateEvery (int) -- log progress every this many games. Defaults to 50.
+
+        moveDf (DataFrame) -- the game's moves already parsed, e.g. its rows from movesSeriesIntoDf.
+            Defaults to None (parsed here with movesStrIntoDf).
+    """
+    if gameRow.name % updateEvery == 0:
+        log.info(f"On game {gameRow.name}")
+
+    with sqlite3.connect(DBPATH) as con:
+        text, compact = _replayTables(con)
+        moveRows, compactRows, gameValues = replayGameRow(gameRow, moveDf, text, compact)
+        _writeReplayed(con, moveRows, compactRows, [gameValues])
+    con.close()  # The with block only ends the transaction
+
+
+def _gameMoveDfs(gamesDf: pd.DataFrame) -> List[pd.DataFrame]:
+    "Parses the moves of every game in one batch, returning each game's moves in the order of gamesDf"
+    assert gamesDf.index.is_unique, "gamesDf index must be unique"
+    moveDfs = dict(iter(movesSeriesIntoDf(gamesDf["moves"]).groupby("gameId", sort=False)))
+    noMoves = movesStrIntoDf("").iloc[:0]
+    return [moveDfs.get(name, noMoves) for name in gamesDf.index]
+
+
+def parseGames(gamesDf: pd.DataFrame, updateEvery: int = 50):
+    """Runs parseGameRow over every game, parsing the moves of all games up front in one batch.
+
+    Args:
+
+        gamesDf (DataFrame) -- games data, one row per game, see parseGameRow. The index must be unique.
+
+        updateEvery (int) -- log progress every this many games. Defaults to 50.
+    """
+    for (_, gameRow), moveDf in zip(gamesDf.iterrows(), _gameMoveDfs(gamesDf)):
+        parseGameRow(gameRow, updateEvery, moveDf)
+
+
+# %% Parallel ingestion
+def _replayTables(con: sqlite3.Connection) -> Tuple[bool, bool]:
+    """Which of moves and movesCompact replayed games are written to: each that exists,
+    and moves if neither does so the error names the table most databases have.
+    """
+    tables = {r[0] for r in con.execute("select name from sqlite_master where type = 'table'")}
+    compact = "movesCompact" in tables
+    return "moves" in tables or not compact, compact
+
+
+def _writeReplayed(con: sqlite3.Connection, moveRows: List[tuple], compactRows: List[tuple], gameRows: List[tuple]):
+    """Writes replayed games in one transaction. A game is only in games once all its moves are in moves
+    and movesCompact, which is what makes resuming by gameId safe. Rows already in the tables are never overwritten,
+    writing a game twice raises sqlite3.IntegrityError and rolls back the whole chunk.
+    """
+    with con:
+        if moveRows:
+            con.executemany("insert into moves values (?, ?, ?, ?, ?)", moveRows)
+        if compactRows:
+            con.executemany("insert into movesCompact values (?, ?, ?, ?, ?)", compactRows)
+        con.executemany("insert into games values (?, ?, ?, ?, ?, ?, ?, ?, ?)", gameRows)
+
+
+def _replayGames(
+    gamesDf: pd.DataFrame, text: bool = True, compact: bool = False
+) -> Tuple[List[tuple], List[tuple], List[tuple], List[str]]:
+    """Replays a chunk of games with replayGameRow. Runs in a worker process.
+    Games with illegal moves or a wrong result are logged and left out rather than failing the chunk.
+
+    Returns:
+
+        tuple -- rows for the moves table, rows for the movesCompact table, rows for the games table,
+            ids of games that failed
+    """
+    moveRows: List[tuple] = []
+    compactRows: List[tuple] = []
+    gameRows: List[tuple] = []
+    failed: List[str] = []
+    for (_, gameRow), moveDf in zip(gamesDf.iterrows(), _gameMoveDfs(gamesDf)):
+        try:
+            gameMoveRows, gameCompactRows, gameValues = replayGameRow(gameRow, moveDf, text, compact)
+        except (MoveError, GameError) as e:
+            log.warning(f"Skipping game {gameRow['id']}: {e}")
+            failed.append(gameRow["id"])
+            continue
+        moveRows.extend(gameMoveRows)
+        compactRows.extend(gameCompactRows)
+        gameRows.append(gameValues)
+    return moveRows, compactRows, gameRows, failed
+
+
+class ingestProgress(object):
+    """Logs how far an ingestion has got, at most once every reportEvery seconds.
+
+    Args:
+
+        total (int) -- games to ingest, if known. Defaults to None (no ETA).
+
+        reportEvery (float) -- seconds between log lines. Defaults to 10.
+    """
+
+    def __init__(self, total: Union[int, None] = None, reportEvery: float = 10.0):
+        self.total = total
+        self.reportEvery = reportEvery
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.moves = 0
+        self.start = time.perf_counter()
+        self.lastReport = self.start
+
+    def update(self, written: int = 0, moves: int = 0, failed: int = 0, skipped: int = 0, force: bool = False):
+        "Adds to the counts and logs if reportEvery seconds have passed, or if force"
+        self.written += written
+        self.moves += moves
+        self.failed += failed
+        self.skipped += skipped
+        now = time.perf_counter()
+        if force or now - self.lastReport >= self.reportEvery:
+            self.lastReport = now
+            log.info(str(self))
+
+    def __str__(self) -> str:
+        seconds = max(time.perf_counter() - self.start, 1e-9)
+        rate = self.written / seconds
+        done = self.written + self.failed + self.skipped
+        out = f"Ingest | {done}{f'/{self.total}' if self.total is not None else ''} games"
+        out += f" | {self.written} written, {self.skipped} already in db or repeated, {self.failed} failed"
+        out += f" | {self.moves} moves | {rate:.1f} games/sec"
+        if self.total is not None and rate > 0:
+            out += f" | ETA {(self.total - done) / rate:.0f}s"
+        return out
+
+
+def ingestChunks(
+    chunks: Iterable[pd.DataFrame],
+    workers: Union[int, None] = None,
+    dbPath: Union[str, None] = None,
+    total: Union[int, None] = None,
+    reportEvery: float = 10.0,
+) -> int:
+    """Replays chunks of games across worker processes and writes them to the moves and games tables.
+    Only this process writes, one transaction per chunk, over a single connection.
+    Games already in the games table are skipped, so an interrupted ingestion can just be rerun, and so is any game
+    whose id was already handed out earlier in the run, so a repeated id costs one game rather than the ingestion.
+    Moves go to the moves table, the movesCompact table (see createCompactTables) or both, whichever exist.
+
+    Args:
+
+        chunks (iterable of DataFrame) -- games data, see parseGameRow. Read lazily, a few chunks per worker at a time.
+
+        workers (int) -- processes replaying games. 1 replays in this process. Defaults to None (one per CPU).
+
+        dbPath (str) -- database to write to, with a games table and moves and/or movesCompact.
+            Defaults to None (DBPATH).
+
+        total (int) -- number of games, for the ETA in progress lines. Defaults to None.
+
+        reportEvery (float) -- seconds between progress lines. Defaults to 10.
+
+    Returns:
+
+        int -- number of games written
+    """
+    dbPath = dbPath or DBPATH
+    workers = workers or os.cpu_count() or 1
+    progress = ingestProgress(total, reportEvery)
+    with sqlite3.connect(dbPath) as con:
+        done = {r[0] for r in con.execute("select gameId from games")}  # Ids written or handed out to replay
+        text, compact = _replayTables(con)
+
+        def newGames() -> Iterator[pd.DataFrame]:
+            for chunk in chunks:
+                new = chunk[~chunk["id"].isin(done) & ~chunk["id"].duplicated()]
+                progress.update(skipped=len(chunk) - len(new))
+                if len(new):
+                    done.update(new["id"])
+                    yield new
+
+        def write(result: Tuple[List[tuple], List[tuple], List[tuple], List[str]]):
+            moveRows, compactRows, gameRows, failed = result
+            _writeReplayed(con, moveRows, compactRows, gameRows)
+            progress.update(written=len(gameRows), moves=max(len(moveRows), len(compactRows)), failed=len(failed))
+
+        if workers == 1:
+            for chunk in newGames():
+                write(_replayGames(chunk, text, compact))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                pending = set()
+                for chunk in newGames():
+                    pending.add(pool.submit(_replayGames, chunk, text, compact))
+                    # Keep a couple of chunks per worker in flight, so memory stays bounded
+                    if len(pending) >= 2 * workers:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            write(future.result())
+                for future in as_completed(pending):
+                    write(future.result())
+    con.close()
+    progress.update(force=True)
+    return progress.written
+
+
+def ingestGames(
+    gamesDf: pd.DataFrame,
+    chunkSize: int = 500,
+    workers: Union[int, None] = None,
+    dbPath: Union[str, None] = None,
+) -> int:
+    """Parallel version of parseGames, see ingestChunks.
+
+    Args:
+
+        gamesDf (DataFrame) -- games data, one row per game, see parseGameRow. The index must be unique.
+
+        chunkSize (int) -- games per batch sent to a worker. Defaults to 500.
+
+        workers (int) -- processes replaying games. Defaults to None (one per CPU).
+
+        dbPath (str) -- database to write to. Defaults to None (DBPATH).
+
+    Returns:
+
+        int -- number of games written
+    """
+    chunks = (gamesDf.iloc[i : i + chunkSize] for i in range(0, len(gamesDf), chunkSize))
+    return ingestChunks(chunks, workers, dbPath, total=len(gamesDf))
+
+
+# %% PGN files
+def pgnGame2Row(game: pgnGame, n: int) -> pd.Series:
+    """Maps a game read by readPgn onto the columns parseGameRow expects.
+
+    Args:
+
+        game (pgnGame) -- game from readPgn
+
+        n (int) -- number of the game in its file, used as the row name
+
+    Returns:
+
+        Series -- named n, with id, rated, turns, winner, victory_status, increment_code,
+            white_rating, black_rating, moves and mateColor. id is from the game's lichess or chess.com URL
+            (Site or Link) if it has one, else pgn + a hash of the Seven Tag Roster and moves, so it is the same
+            whichever file or position the game is read from.
+    """
+    headers = game["headers"]
+    moves = game["moves"]
+    gameId = None
+    for tag in ("Site", "Link"):
+        match = GAMEURLPATTERN.match(headers.get(tag, "").strip())
+        if match:
+            gameId = match.group(1)
+            break
+    if gameId is None:
+        tags = "\n".join(headers.get(tag, "?") for tag in SEVENTAGROSTER)
+        gameId = "pgn" + hashlib.sha1(f"{tags}\n{' '.join(moves)}".encode()).hexdigest()[:20]
+    winner = {"1-0": "white", "0-1": "black", "1/2-1/2": "draw"}.get(game["result"], "unknown")
+    if moves and moves[-1].endswith("#"):
+        victoryStatus = "mate"
+    elif headers.get("Termination", "").lower() == "time forfeit":
+        victoryStatus = "outoftime"
+    elif winner == "draw":
+        victoryStatus = "draw"
     else:
-        # log.info(f"Finished entirety of moves with no outcome")
-        pass
+        victoryStatus = "resign"
 
-    out = pd.DataFrame(
+    # TimeControl is seconds+increment, increment_code is minutes+increment
+    timeControl = headers.get("TimeControl", "-")
+    if "+" in timeControl and timeControl.split("+")[0].isdigit():
+        base, increment = timeControl.split("+", 1)
+        incrementCode = f"{int(base) // 60}+{increment}"
+    else:
+        incrementCode = timeControl
+
+    def rating(tag: str) -> int:
+        value = headers.get(tag, "")
+        return int(value) if value.isdigit() else 0
+
+    return pd.Series(
         {
-            "gameId": [gameRow["id"]] * len(moveDf),
-            "moveNum": moveNums,
-            "oldBoardStr": oldBoardStr,
-            "moveStr": moveStr,
-            "newBoardStr": newBoardStr,
-        }
-    )
-    dfToTable(out, "moves", DBPATH, ifExists="append", indexCols=None)
-    executeSql(
-        f"""
-        Insert into games values (
-            '{gameRow['id']}',
-            '{gameRow['rated'] == 'true'}',
-            '{gameRow['turns']}',
-            '{gameRow['winner'][0]}',
-            '{gameRow['victory_status']}',
-            '{gameRow['increment_code']}',
-            '{gameRow['white_rating']}',
-            '{gameRow['black_rating']}',
-            '{gameRow['moves']}'
-        )
-        """,
-        DBPATH,
+            "id": gameId,
+            "rated": "true" if "rated" in headers.get("Event", "").lower().split() else "false",
+            "turns": len(moves),
+            "winner": winner,
+            "victory_status": victoryStatus,
+            "increment_code": incrementCode,
+            "white_rating": rating("WhiteElo"),
+            "black_rating": rating("BlackElo"),
+            "moves": " ".join(moves),
+            "mateColor": winner[0] if victoryStatus == "mate" else None,
+        },
+        name=n,
     )
 
 
+def _pgnChunks(fp: str, chunkSize: int, limit: Union[int, None]) -> Iterator[pd.DataFrame]:
+    "Reads a PGN file as DataFrames of chunkSize games, see pgnGame2Row"
+    rows = []
+    for n, game in enumerate(readPgn(fp, limit), 1):
+        rows.append(pgnGame2Row(game, n))
+        if len(rows) >= chunkSize:
+            yield pd.DataFrame(rows)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+def ingestPgn(
+    fp: str,
+    chunkSize: int = 500,
+    workers: Union[int, None] = None,
+    limit: Union[int, None] = None,
+    dbPath: Union[str, None] = None,
+) -> int:
+    """Streams the games of a PGN file (optionally .gz or .bz2) into the moves and games tables with ingestChunks.
+    Games are read chunkSize at a time, so memory stays bounded however large the file is.
+
+    Args:
+
+        fp (str) -- path to the PGN file
+
+        chunkSize (int) -- games per batch. Defaults to 500.
+
+        workers (int) -- processes replaying games. Defaults to None (one per CPU).
+
+        limit (int) -- stop after this many games. Defaults to None (whole file).
+
+        dbPath (str) -- database to write to. Defaults to None (DBPATH).
+
+    Returns:
+
+        int -- number of games written
+    """
+    return ingestChunks(_pgnChunks(fp, chunkSize, limit), workers=workers, dbPath=dbPath)
+
+
 # Database table creation
 def createBoardsTable(dbPath, dropOld=False):
     """
-    Creates table 'boards', mapping moves to board layout.
+    Creates table 'boards', the persistent move generation cache behind moveCache.
 
     Columns:
+        positionKey: Zobrist hash of the position as a signed integer, see signedKey
         boardStr: string of board layout
         toMove: str of color to move
         validMovesStr: str of list of valid moves
-        validBoardsStr: str of list of validBoards, comma separated
+        validBoardsStr: str of list of validBoards, comma separated. Not filled by moveCache,
+            boards are cheaper to rebuild from the moves than to store.
+        hits: times the position was looked up, used to pick the positions to preload
+
+    Primary key on positionKey, index on boardStr, toMove and on hits.
 
-    Index on boardStr, toMove.
+    A boards table from before positionKey (keyed by boardStr and toMove) is migrated rather than left as is,
+    see _migrateBoards.
 
     Passes through all commands to runSqlQuery fn,
     so if default args for that change, so will this.
@@ -1386,24 +2210,84 @@ def createBoardsTable(dbPath, dropOld=False):
         """
         executeSql(q, dbPath)
 
+    # Move a table without positionKey aside, its rows are copied over once the new table exists
+    with sqlite3.connect(dbPath) as con:
+        columns = [r[1] for r in con.execute("pragma table_info(boards)")]
+        if columns and "positionKey" not in columns:
+            log.info("Found a boards table without positionKey, migrating it")
+            con.execute("drop index if exists boardsBoardStrToMoveIdx")
+            con.execute("alter table boards rename to boardsOld")
+        migrate = con.execute("select 1 from sqlite_master where type = 'table' and name = 'boardsOld'").fetchone()
+    con.close()
+
     # Create table and indeces
     q = f"""
-    create table boards(
+    create table if not exists boards(
+        positionKey INTEGER not null,
         boardStr TEXT not null,
         toMove TEXT not null,
         validMovesStr TEXT,
         validBoardsStr TEXT,
-        primary key (boardStr asc, toMove asc)
+        hits INTEGER not null default 0,
+        primary key (positionKey asc)
     )
     """
     executeSql(q, dbPath)
     q = f"""
-    CREATE INDEX boardsBoardStrToMoveIdx
+    CREATE INDEX if not exists boardsBoardStrToMoveIdx
     ON boards(boardStr, toMove)
     """
+    executeSql(q, dbPath)
+    q = f"""
+    CREATE INDEX if not exists boardsHitsIdx
+    ON boards(hits desc)
+    """
+    executeSql(q, dbPath)
+    if migrate:
+        _migrateBoards(dbPath)
     log.info(f"Success!")
 
 
+def _migrateBoards(dbPath, chunkSize: int = 10_000):
+    """Copies rows of 'boardsOld', a boards table from before positionKey, into 'boards' and drops it.
+    Keys come from each row's board, with en passant recovered as in migrateToCompact. Boards that differ only in
+    hasMoved are one position, the first row of each is kept. Safe to rerun if interrupted.
+
+    Args:
+
+        dbPath (str) -- path to database
+
+        chunkSize (int) -- rows converted per insert. Defaults to 10,000.
+    """
+    with sqlite3.connect(dbPath) as con:
+        cur = con.execute("select boardStr, toMove, validMovesStr, validBoardsStr from boardsOld")
+        copied = skipped = 0
+        while rows := cur.fetchmany(chunkSize):
+            out = []
+            for boardStr, toMove, validMovesStr, validBoardsStr in rows:
+                try:
+                    board = str2Board(boardStr)
+                    validMoves = str2Moves(validMovesStr) if validMovesStr else []
+                    pos = board2Position(board, toMove, _epPrevMoves(board, toMove, validMoves, None))
+                except (ValueError, KeyError, IndexError, AssertionError) as e:
+                    log.warning(f"Skipping boards row that does not decode: {e}")
+                    skipped += 1
+                    continue
+                out.append((signedKey(pos.key), boardStr, toMove, validMovesStr, validBoardsStr))
+            con.executemany(
+                "insert or ignore into boards (positionKey, boardStr, toMove, validMovesStr, validBoardsStr) "
+                "values (?, ?, ?, ?, ?)",
+                out,
+            )
+            con.commit()
+            copied += len(out)
+            log.info(f"Migrated {copied} boards")
+        con.execute("drop table boardsOld")
+        con.commit()
+    con.close()
+    log.info(f"Migrated {copied} boards rows to positionKey, skipped {skipped}")
+
+
 def createMovesTable(dbPath, dropOld=False):
     # Drop old table if exists
     if dropOld:
@@ -1463,6 +2347,462 @@ def createGamesTable(dbPath, dropOld=True):
     log.info("Success!")
 
 
+def createCompactTables(dbPath, dropOld=False):
+    """
+    Creates tables 'movesCompact' and 'boardsCompact', the binary counterparts of 'moves' and 'boards'.
+    Boards are boardCodec.BOARDBYTES blobs that include the color to move, lists of boards are blobs concatenated.
+    Once movesCompact exists, parseGameRow, ingestGames and ingestPgn write to it as well as (or, if moves was
+    dropped, instead of) moves. migrateToCompact fills it with what was ingested before.
+
+    Columns of movesCompact: gameId, moveNum, moveStr, oldBoard, newBoard
+    Columns of boardsCompact: board, validMovesStr, validBoards
+    """
+    if dropOld:
+        executeSql("drop table if exists movesCompact", dbPath)
+        executeSql("drop table if exists boardsCompact", dbPath)
+
+    q = f"""
+    create table if not exists movesCompact(
+        gameId TEXT not null,
+        moveNum INTEGER not null,
+        moveStr TEXT not null,
+        oldBoard BLOB not null,
+        newBoard BLOB not null,
+        primary key (gameId asc, moveNum asc)
+    )
+    """
+    executeSql(q, dbPath)
+    q = f"""
+    create table if not exists boardsCompact(
+        board BLOB not null,
+        validMovesStr TEXT,
+        validBoards BLOB,
+        primary key (board asc)
+    )
+    """
+    executeSql(q, dbPath)
+    log.info(f"Success!")
+
+
+def migrateToCompact(dbPath, chunkSize: int = 10_000, dropOld: bool = False):
+    """Copies 'moves' and 'boards' into 'movesCompact' and 'boardsCompact', chunkSize rows at a time so memory stays
+    flat on large archives. Safe to rerun, rows already copied are skipped.
+
+    The text tables do not store en passant for a board directly. For moves it is recovered from the previous move
+    of the game. For boards it is recovered from the positionKey column where there is one (the Zobrist key covers
+    the en passant file), otherwise from an en passant capture among the valid moves, see _epPrevMoves.
+    The valid boards get it from the move leading to each.
+
+    Args:
+
+        dbPath (str) -- path to database
+
+        chunkSize (int) -- rows converted per insert. Defaults to 10,000.
+
+        dropOld (bool) -- drop the text tables and vacuum once copied. Defaults to False.
+    """
+    createCompactTables(dbPath)
+    with sqlite3.connect(dbPath) as con:
+        tables = {r[0] for r in con.execute("select name from sqlite_master where type = 'table'")}
+
+        if "moves" in tables:
+            cur = con.execute("select gameId, moveNum, moveStr, oldBoardStr, newBoardStr from moves order by 1, 2")
+            prevGameId, prevMoves = None, []
+            copied = 0
+            while rows := cur.fetchmany(chunkSize):
+                out = []
+                for gameId, moveNum, moveStr, oldBoardStr, newBoardStr in rows:
+                    if gameId != prevGameId:
+                        prevGameId, prevMoves = gameId, []
+                    move = str2Move(moveStr)
+                    toMove: Literal["w", "b"] = move["piece"][0]  # type: ignore
+                    oldBoard = board2Bytes(str2Board(oldBoardStr), toMove, prevMoves)
+                    newBoard = board2Bytes(str2Board(newBoardStr), getOtherColor(toMove), [move])
+                    out.append((gameId, moveNum, moveStr, oldBoard, newBoard))
+                    prevMoves = [move]
+                con.executemany("insert or ignore into movesCompact values (?, ?, ?, ?, ?)", out)
+                con.commit()
+                copied += len(rows)
+                log.info(f"Migrated {copied} moves")
+
+        if "boards" in tables:
+            columns = [r[1] for r in con.execute("pragma table_info(boards)")]
+            keyCol = "positionKey" if "positionKey" in columns else "null"
+            cur = con.execute(f"select boardStr, toMove, validMovesStr, validBoardsStr, {keyCol} from boards")
+            copied = 0
+            while rows := cur.fetchmany(chunkSize):
+                out = []
+                for boardStr, toMove, validMovesStr, validBoardsStr, positionKey in rows:
+                    board = str2Board(boardStr)
+                    validMoves = str2Moves(validMovesStr) if validMovesStr else []
+                    validBoards = str2Boards(validBoardsStr or "")
+                    out.append(
+                        (
+                            board2Bytes(board, toMove, _epPrevMoves(board, toMove, validMoves, positionKey)),
+                            validMovesStr,
+                            boards2Bytes(validBoards, getOtherColor(toMove), validMoves),
+                        )
+                    )
+                con.executemany("insert or ignore into boardsCompact values (?, ?, ?)", out)
+                con.commit()
+                copied += len(rows)
+                log.info(f"Migrated {copied} boards")
+
+        if dropOld:
+            con.execute("drop table if exists moves")
+            con.execute("drop table if exists boards")
+            con.commit()
+    if dropOld:
+        executeSql("vacuum", dbPath)
+    log.info(f"Success!")
+
+
+def _epPrevMoves(
+    board: dict[str, empty | piece],
+    toMove: Literal["w", "b"],
+    validMoves: List[moveDict],
+    positionKey: Union[int, None],
+) -> List[moveDict]:
+    """Works out the pawn double move that must have led to a boards row, so board2Bytes keeps its en passant file.
+
+    Args:
+
+        board (dict) -- the row's board
+
+        toMove (str) -- w or b
+
+        validMoves (list of dict) -- the row's valid moves
+
+        positionKey (int) -- the row's signed Zobrist key, None if the table has none
+
+    Returns:
+
+        list of dict -- the double move as prevMoves for board2Position, empty if there is no en passant
+    """
+    waiting = getOtherColor(toMove)
+    fromRank, toRank = ("2", "4") if waiting == "w" else ("7", "5")
+    passedRank = "3" if waiting == "w" else "6"
+    candidates = [
+        {"piece": waiting + "P", "oldSquare": f + fromRank, "newSquare": f + toRank, "special": None}
+        for f in FILES
+        if str(board[f + toRank]) == waiting + "P"
+        and isinstance(board[f + passedRank], empty)
+        and isinstance(board[f + fromRank], empty)
+    ]
+    if positionKey is not None:
+        for prevMove in candidates:
+            if signedKey(board2Position(board, toMove, [prevMove]).key) == positionKey:
+                return [prevMove]
+        return []
+    epFiles = {m["newSquare"][0] for m in validMoves if m["special"] == "enpassant"}
+    return [m for m in candidates if m["newSquare"][0] in epFiles][:1]
+
+
+def createPositionTables(dbPath, dropOld=False):
+    """
+    Creates tables 'positionStats' and 'positionIndexedGames', the position explorer's index, see indexPositions.
+
+    Columns of positionStats: positionKey (Zobrist hash as a signed integer), move (bitboard move int), games,
+        whiteWins, draws, blackWins, whiteRatingSum, blackRatingSum. One row per position and move played from it.
+    Columns of positionIndexedGames: gameId of every game already counted in positionStats
+    """
+    if dropOld:
+        executeSql("drop table if exists positionStats", dbPath)
+        executeSql("drop table if exists positionIndexedGames", dbPath)
+
+    q = f"""
+    create table if not exists positionStats(
+        positionKey INTEGER not null,
+        move INTEGER not null,
+        games INTEGER not null,
+        whiteWins INTEGER not null,
+        draws INTEGER not null,
+        blackWins INTEGER not null,
+        whiteRatingSum INTEGER not null,
+        blackRatingSum INTEGER not null,
+        primary key (positionKey asc, move asc)
+    ) without rowid
+    """
+    executeSql(q, dbPath)
+    q = f"""
+    create table if not exists positionIndexedGames(
+        gameId TEXT not null,
+        primary key (gameId asc)
+    ) without rowid
+    """
+    executeSql(q, dbPath)
+    log.info(f"Success!")
+
+
+# %% Opening book
+def getBook() -> Union[openingBook, None]:
+    "Returns the opening book at BOOKPATH, opening it on first use. None if it has not been built."
+    global BOOK
+    if BOOK is None and os.path.exists(BOOKPATH):
+        BOOK = openingBook(BOOKPATH)
+    return BOOK
+
+
+def buildOpeningBook(
+    dbPath: Union[str, None] = None,
+    bookPath: Union[str, None] = None,
+    maxPly: int = 24,
+    minCount: int = 2,
+    chunkSize: int = 10_000,
+    maxStats: int = 1_000_000,
+) -> int:
+    """Aggregates the first maxPly moves of every game in the moves table into an opening book, see openingBook.
+    Positions are keyed by Zobrist hash, so transpositions share their statistics. Results come from games.winner.
+    Counts are kept in memory up to maxStats (position, move) pairs, then added into a temporary sqlite table, so
+    memory stays bounded however large the archive is. The book is then written from that table in key order.
+
+    Args:
+
+        dbPath (str) -- database with moves and games tables. Defaults to None (DBPATH).
+
+        bookPath (str) -- book file to write. Defaults to None (BOOKPATH).
+
+        maxPly (int) -- moves of each game to include. Defaults to 24.
+
+        minCount (int) -- leave out moves played fewer times. Defaults to 2.
+
+        chunkSize (int) -- rows read at a time. Defaults to 10,000.
+
+        maxStats (int) -- (position, move) pairs counted in memory before adding them into the temporary table.
+            Defaults to 1,000,000.
+
+    Returns:
+
+        int -- number of book entries written
+    """
+    global BOOK
+    dbPath = dbPath or DBPATH
+    bookPath = bookPath or BOOKPATH
+    stats: dict[tuple[int, int], List[int]] = {}
+    keys: dict[tuple[str, str], int] = {}  # Opening positions repeat a lot, so only parse each board once
+    spillDir = tempfile.TemporaryDirectory()
+    spill = sqlite3.connect(os.path.join(spillDir.name, "bookStats.db"))
+    spill.execute(
+        "create table bookStats(positionKey INTEGER, move INTEGER, n INTEGER, wins INTEGER, draws INTEGER, "
+        "primary key (positionKey, move))"
+    )
+
+    def spillStats() -> None:
+        with spill:
+            spill.executemany(
+                """
+                insert into bookStats values (?, ?, ?, ?, ?)
+                on conflict (positionKey, move) do update set
+                    n = n + excluded.n, wins = wins + excluded.wins, draws = draws + excluded.draws
+                """,
+                [(signedKey(key), move, *counts) for (key, move), counts in stats.items()],
+            )
+        stats.clear()
+
+    with sqlite3.connect(dbPath) as con:
+        cur = con.execute(
+            """
+            select m.gameId, m.oldBoardStr, m.moveStr, g.winner
+            from moves m join games g on g.gameId = m.gameId
+            where m.moveNum <= ?
+            order by m.gameId, m.moveNum
+            """,
+            (maxPly,),
+        )
+        prevGameId, prevMoveStr = None, ""
+        read = 0
+        while rows := cur.fetchmany(chunkSize):
+            for gameId, oldBoardStr, moveStr, winner in rows:
+                if gameId != prevGameId:
+                    prevGameId, prevMoveStr = gameId, ""
+                move = str2Move(moveStr)
+                toMove: Literal["w", "b"] = move["piece"][0]  # type: ignore
+                # The previous move only matters for en passant
+                prevMoves = [str2Move(prevMoveStr)] if prevMoveStr else []
+                cacheKey = (oldBoardStr, prevMoveStr if prevMoves and prevMoves[0]["piece"][1] == "P" else "")
+                if cacheKey not in keys:
+                    if len(keys) > 1_000_000:
+                        keys.clear()
+                    keys[cacheKey] = board2Position(str2Board(oldBoardStr), toMove, prevMoves).key
+                counts = stats.setdefault((keys[cacheKey], moveDict2Int(move)), [0, 0, 0])
+                counts[0] += 1
+                if winner == toMove:
+                    counts[1] += 1
+                elif winner == "d":
+                    counts[2] += 1
+                prevMoveStr = moveStr
+            read += len(rows)
+            if len(stats) >= maxStats:
+                spillStats()
+            log.info(f"Read {read} moves into the opening book")
+    con.close()
+    spillStats()
+
+    if BOOK is not None and os.path.abspath(BOOK.fp) == os.path.abspath(bookPath):
+        BOOK.close()
+        BOOK = None
+    # Keys are stored signed, so unsigned order is the non-negative ones then the negative ones
+    rows = spill.execute(
+        """
+        select positionKey, move, n, wins, draws from bookStats
+        where n >= ?
+        order by positionKey < 0, positionKey, n desc, move
+        """,
+        (minCount,),
+    )
+    written = writeBookRows(bookPath, ((key % (1 << 64), *rest) for key, *rest in rows))
+    total = spill.execute("select count(*) from bookStats").fetchone()[0]
+    spill.close()
+    spillDir.cleanup()
+    log.info(f"Wrote {written} of {total} book moves to {bookPath}")
+    return written
+
+
+# %% Position explorer
+def signedKey(key: int) -> int:
+    "Returns a 64-bit Zobrist key as the signed integer SQLite can store"
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def indexPositions(dbPath: Union[str, None] = None, chunkSize: int = 1000) -> int:
+    """Adds every game in the games table not yet indexed to positionStats, counting each move played from each
+    position along with the game's result and ratings. Games are replayed on bitboards from moves.moveStr, so
+    no board strings are parsed. Each chunk commits with its games marked as indexed, so an interrupted run can
+    simply be rerun.
+
+    Args:
+
+        dbPath (str) -- database with moves and games tables. Defaults to None (DBPATH).
+
+        chunkSize (int) -- games per transaction. Defaults to 1000.
+
+    Returns:
+
+        int -- number of games indexed
+    """
+    dbPath = dbPath or DBPATH
+    createPositionTables(dbPath)
+    indexed = 0
+    lastGameId = ""
+    with sqlite3.connect(dbPath) as con:
+        while True:
+            # Page through games in gameId order, so memory stays bounded however many there are
+            page = con.execute(
+                """
+                select g.gameId, g.winner, g.whiteRating, g.blackRating, p.gameId is not null
+                from games g left join positionIndexedGames p on p.gameId = g.gameId
+                where g.gameId > ?
+                order by g.gameId
+                limit ?
+                """,
+                (lastGameId, chunkSize),
+            ).fetchall()
+            if not page:
+                break
+            firstGameId, lastGameId = page[0][0], page[-1][0]
+            games = {r[0]: r[1:4] for r in page if not r[4]}
+            if not games:
+                continue
+
+            stats: dict[tuple[int, int], List[int]] = {}
+            pos, prevGameId = position.startPosition(), None
+            for gameId, moveStr in con.execute(
+                "select gameId, moveStr from moves where gameId between ? and ? order by gameId, moveNum",
+                (firstGameId, lastGameId),
+            ):
+                if gameId not in games:
+                    continue
+                if gameId != prevGameId:
+                    pos, prevGameId = position.startPosition(), gameId
+                winner, whiteRating, blackRating = games[gameId]
+                m = moveDict2Int(str2Move(moveStr))
+                counts = stats.setdefault((signedKey(pos.key), m), [0, 0, 0, 0, 0, 0])
+                counts[0] += 1
+                counts[1] += winner == "w"
+                counts[2] += winner == "d"
+                counts[3] += winner == "b"
+                counts[4] += whiteRating
+                counts[5] += blackRating
+                pos.makeMove(m)
+
+            with con:
+                con.executemany(
+                    """
+                    insert into positionStats values (?, ?, ?, ?, ?, ?, ?, ?)
+                    on conflict (positionKey, move) do update set
+                        games = games + excluded.games,
+                        whiteWins = whiteWins + excluded.whiteWins,
+                        draws = draws + excluded.draws,
+                        blackWins = blackWins + excluded.blackWins,
+                        whiteRatingSum = whiteRatingSum + excluded.whiteRatingSum,
+                        blackRatingSum = blackRatingSum + excluded.blackRatingSum
+                    """,
+                    [(key, m, *counts) for (key, m), counts in stats.items()],
+                )
+                con.executemany("insert into positionIndexedGames values (?)", [(g,) for g in games])
+            indexed += len(games)
+            log.info(f"Indexed positions of {indexed} games")
+    con.close()
+    return indexed
+
+
+def explorePosition(
+    source: Union["chessGame", position, dict[str, empty | piece]],
+    toMove: Literal["w", "b"] = "w",
+    prevMoves: Union[List[moveDict], None] = None,
+    dbPath: Union[str, None] = None,
+) -> pd.DataFrame:
+    """Returns what was played from a position across the ingested games, and how it scored.
+    One indexed lookup on positionStats, see indexPositions, so it takes milliseconds however many games there are.
+
+    Args:
+
+        source (chessGame, position or dict) -- the position. A dict board also needs toMove and prevMoves.
+
+        toMove (str) -- w or b, for a dict board. Defaults to w.
+
+        prevMoves (list of dict) -- previous moves, for en passant on a dict board. Defaults to None (none).
+
+        dbPath (str) -- database with positionStats. Defaults to None (DBPATH).
+
+    Returns:
+
+        DataFrame -- one row per move, most played first. Columns are san, uci, games, whiteWins, draws, blackWins,
+            whiteScore (share of points won by white), avgWhiteRating and avgBlackRating
+    """
+    if isinstance(source, chessGame):
+        pos = source.position
+    elif isinstance(source, position):
+        pos = source
+    else:
+        pos = board2Position(source, toMove, prevMoves or [])
+
+    with sqlite3.connect(dbPath or DBPATH) as con:
+        rows = con.execute(
+            """
+            select move, games, whiteWins, draws, blackWins, whiteRatingSum, blackRatingSum
+            from positionStats
+            where positionKey = ?
+            order by games desc, move
+            """,
+            (signedKey(pos.key),),
+        ).fetchall()
+    con.close()
+
+    columns = ["move", "games", "whiteWins", "draws", "blackWins", "whiteRatingSum", "blackRatingSum"]
+    df = pd.DataFrame(rows, columns=columns)
+    index = moveIndex(pos)
+    legal = set(index.moves)
+    df["san"] = [index.san(m) if m in legal else None for m in df["move"]]  # None only on a hash collision
+    df["uci"] = [moveToUci(m) for m in df["move"]]
+    df["whiteScore"] = (df["whiteWins"] + df["draws"] / 2) / df["games"]
+    df["avgWhiteRating"] = df["whiteRatingSum"] / df["games"]
+    df["avgBlackRating"] = df["blackRatingSum"] / df["games"]
+    return df[
+        ["san", "uci", "games", "whiteWins", "draws", "blackWins", "whiteScore", "avgWhiteRating", "avgBlackRating"]
+    ]
+
+
 # %% Main
 if __name__ == "__main__":
     # Simple M1 blunders abound
@@ -1476,11 +2816,8 @@ if __name__ == "__main__":
     # Other game
     game = chessGame()
     game.move("e2", "e4")
-    board = game.board
-    toMove: Literal["w", "b"] = "b"
-    prevMoves = game.prevMoves
     # game.recMove()
-    getMoveScore(board, toMove, toMove, prevMoves, currDepth=1, maxDepth=5)
+    print(game.search(depth=5))
     game.show()
     # game.move("e7", "e5")
     # game.move("g1", "f3")
@@ -0,0 +1,111 @@
+# %% Imports
+from attackTables import bishopAttacks, rookAttacks
+from bitboard import BISHOP, BLACK, FLAGENPASSANT, KING, NOPIECE, PAWN, QUEEN, ROOK, WHITE, position
+from pieceSquareTables import MAXPHASE, PHASE, PIECEVALUES, PSQEG, PSQMG
+
+
+# %% Constants
+SEEVALUES: list[int] = PIECEVALUES[:5] + [20_000]  # King is worth more than anything it could win
+
+
+# %% Evaluation
+def materialScore(pos: position) -> int:
+    "Returns material balance in centipawns from white's perspective"
+    pieces = pos.pieces
+    score = 0
+    for pieceType in range(5):
+        score += PIECEVALUES[pieceType] * (pieces[pieceType].bit_count() - pieces[6 + pieceType].bit_count())
+    return score
+
+
+def evaluate(pos: position) -> int:
+    """Returns score of pos in centipawns from the side to move's perspective. Positive is good for the side to move.
+    Material and piece-square scores are kept up to date by the position as pieces move, so this only blends
+    the middlegame and endgame scores by game phase.
+    """
+    phase = pos.phase if pos.phase < MAXPHASE else MAXPHASE
+    score = (pos.mgScore * phase + pos.egScore * (MAXPHASE - phase)) // MAXPHASE
+    return -score if pos.toMove == BLACK else score
+
+
+def evaluateFromScratch(pos: position) -> int:
+    "Same as evaluate, recomputing every term from the pieces on the board. For checking the incremental scores."
+    mgScore = 0
+    egScore = 0
+    phase = 0
+    for sq, p in enumerate(pos.squares):
+        if p == NOPIECE:
+            continue
+        mgScore += PSQMG[p][sq]
+        egScore += PSQEG[p][sq]
+        phase += PHASE[p]
+    phase = min(phase, MAXPHASE)
+    score = (mgScore * phase + egScore * (MAXPHASE - phase)) // MAXPHASE
+    return -score if pos.toMove == BLACK else score
+
+
+# %% Static exchange evaluation
+def see(pos: position, m: int) -> int:
+    """Static exchange evaluation: the material the side to move wins (negative if it loses) by playing capture m
+    and then both sides recapturing on the target square with their least valuable attacker, each stopping
+    when continuing would lose material. Uses attack tables only, no moves are made.
+
+    Args:
+
+        pos (position) -- position with m legal for the side to move
+
+        m (int) -- move, usually a capture or promotion
+
+    Returns:
+
+        int -- expected material gain in centipawns
+    """
+    fr = m & 63
+    to = (m >> 6) & 63
+    promoteTo = (m >> 12) & 7
+    pieces = pos.pieces
+    occupied = pos.occupied[WHITE] | pos.occupied[BLACK]
+
+    # First capture
+    if m >> 15 == FLAGENPASSANT:
+        gain = [SEEVALUES[PAWN]]
+        occupied ^= 1 << (to - 8 if pos.toMove == WHITE else to + 8)
+    else:
+        victim = pos.squares[to]
+        gain = [SEEVALUES[victim % 6] if victim != NOPIECE else 0]
+    pieceValue = SEEVALUES[pos.squares[fr] % 6]
+    if promoteTo:
+        gain[0] += SEEVALUES[promoteTo] - SEEVALUES[PAWN]
+        pieceValue = SEEVALUES[promoteTo]
+
+    # Alternate recaptures, gain[d] is the running balance if the piece on `to` is taken at depth d
+    bishopsQueens = pieces[BISHOP] | pieces[QUEEN] | pieces[6 + BISHOP] | pieces[6 + QUEEN]
+    rooksQueens = pieces[ROOK] | pieces[QUEEN] | pieces[6 + ROOK] | pieces[6 + QUEEN]
+    attackers = pos.attackersTo(to, occupied)
+    fromBit = 1 << fr
+    side = pos.toMove
+    d = 0
+    while True:
+        d += 1
+        side ^= 1
+        gain.append(pieceValue - gain[d - 1])
+        occupied ^= fromBit
+        # Removing the last capturer can uncover sliders behind it
+        attackers |= (bishopAttacks(to, occupied) & bishopsQueens) | (rookAttacks(to, occupied) & rooksQueens)
+        attackers &= occupied
+        sideAttackers = attackers & pos.occupied[side]
+        if not sideAttackers:
+            break
+        for pieceType in range(KING + 1):
+            bb = sideAttackers & pieces[side * 6 + pieceType]
+            if bb:
+                fromBit = bb & -bb
+                pieceValue = SEEVALUES[pieceType]
+                break
+
+    # Each side picks the better of capturing or standing pat, from the end of the sequence back
+    d -= 1
+    while d:
+        gain[d - 1] = -max(-gain[d - 1], gain[d])
+        d -= 1
+    return gain[0]
@@ -0,0 +1,78 @@
+# %% Imports
+from typing import List
+
+from bitboard import FLAGENPASSANT, NOPIECE, PAWN, position
+from evaluation import SEEVALUES
+
+
+# %% Constants
+MAXPLY = 128
+MVVLVAVALUES: list[int] = [v // 100 for v in SEEVALUES]  # In pawns, so the victim always outweighs the attacker
+
+# Move order bands, highest first
+TTMOVESCORE = 10_000_000
+CAPTURESCORE = 1_000_000  # + MVV-LVA, promotions land here too
+KILLERSCORES = (900_000, 800_000)
+HISTORYMAX = 500_000  # History scores are halved when any reaches this, so quiets stay below killers
+
+
+# %% Move ordering
+class moveOrderer(object):
+    """Orders moves so the ones most likely to cause a cutoff are searched first:
+    the transposition table move, then captures by MVV-LVA (most valuable victim, least valuable attacker),
+    then killer moves for the ply, then the remaining quiet moves by history score.
+    """
+
+    def __init__(self):
+        self.killers: list[list[int]] = [[0, 0] for _ in range(MAXPLY + 1)]
+        self.history: list[int] = [0] * (12 * 64)  # [piece code * 64 + newSquare]
+
+    def clear(self) -> None:
+        "Forgets killers and history, e.g. for a new game"
+        self.killers = [[0, 0] for _ in range(MAXPLY + 1)]
+        self.history = [0] * (12 * 64)
+
+    def newSearch(self) -> None:
+        "Keeps history from earlier searches but weights it down, killers are position specific so are reset"
+        self.killers = [[0, 0] for _ in range(MAXPLY + 1)]
+        self.history = [h >> 1 for h in self.history]
+
+    def isQuiet(self, pos: position, m: int) -> bool:
+        "Is m neither a capture nor a promotion?"
+        return pos.squares[(m >> 6) & 63] == NOPIECE and not (m >> 12) & 7 and m >> 15 != FLAGENPASSANT
+
+    def scoreMove(self, pos: position, m: int, ttMove: int, ply: int) -> int:
+        if m == ttMove:
+            return TTMOVESCORE
+        squares = pos.squares
+        victim = squares[(m >> 6) & 63]
+        promoteTo = (m >> 12) & 7
+        if victim != NOPIECE:
+            attacker = squares[m & 63] % 6
+            return CAPTURESCORE + MVVLVAVALUES[victim % 6] * 100 - MVVLVAVALUES[attacker] + promoteTo * 1000
+        if m >> 15 == FLAGENPASSANT:
+            return CAPTURESCORE + MVVLVAVALUES[PAWN] * 100 - MVVLVAVALUES[PAWN]
+        if promoteTo:
+            return CAPTURESCORE + promoteTo * 1000
+        killers = self.killers[ply]
+        if m == killers[0]:
+            return KILLERSCORES[0]
+        if m == killers[1]:
+            return KILLERSCORES[1]
+        return self.history[squares[m & 63] * 64 + ((m >> 6) & 63)]
+
+    def orderMoves(self, pos: position, moves: List[int], ttMove: int = 0, ply: int = 0) -> List[int]:
+        "Sorts moves in place, best first, and returns them"
+        moves.sort(key=lambda m: self.scoreMove(pos, m, ttMove, ply), reverse=True)
+        return moves
+
+    def updateCutoff(self, pos: position, m: int, depth: int, ply: int) -> None:
+        "Records that quiet move m caused a beta cutoff at ply, searched depth plies. Call after unmaking m."
+        killers = self.killers[ply]
+        if killers[0] != m:
+            killers[1] = killers[0]
+            killers[0] = m
+        idx = pos.squares[m & 63] * 64 + ((m >> 6) & 63)
+        self.history[idx] += depth * depth
+        if self.history[idx] >= HISTORYMAX:
+            self.history = [h >> 1 for h in self.history]
@@ -0,0 +1,127 @@
+# %% Imports
+import re
+from typing import List, Union
+
+from bitboard import (
+    FLAGENPASSANT,
+    FLAGLONGCASTLE,
+    FLAGSHORTCASTLE,
+    NOPIECE,
+    PAWN,
+    PIECENAMES,
+    SQUAREINDEX,
+    SQUARENAMES,
+    position,
+)
+
+
+# %% Constants
+# Piece, origin file, origin rank, capture, target square, promotion, e.g. Nbd7, exd5, e8=Q, R1xa3
+SANPATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])=?([NBRQ])?$")
+CASTLESAN = {"O-O": FLAGSHORTCASTLE, "O-O-O": FLAGLONGCASTLE, "0-0": FLAGSHORTCASTLE, "0-0-0": FLAGLONGCASTLE}
+
+
+# %% Move index
+class moveIndex(object):
+    """Legal moves of a position, indexed for constant time lookup by (piece code, newSquare)
+    and by (oldSquare, newSquare, promotion). Also converts moves to and from standard algebraic notation (SAN).
+    Only valid while pos is unchanged.
+
+    Args:
+
+        pos (position) -- position to index
+
+        moves (list of int) -- legal moves of pos, if already generated. Defaults to None (generated here).
+    """
+
+    def __init__(self, pos: position, moves: Union[List[int], None] = None):
+        self.pos = pos
+        self.moves: List[int] = pos.legalMoves() if moves is None else moves
+        self.byTarget: dict[tuple[int, int], List[int]] = {}
+        self.bySquares: dict[tuple[int, int, int], int] = {}
+        squares = pos.squares
+        for m in self.moves:
+            fr = m & 63
+            to = (m >> 6) & 63
+            self.byTarget.setdefault((squares[fr], to), []).append(m)
+            self.bySquares[(fr, to, (m >> 12) & 7)] = m
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def lookup(self, oldSquare: int, newSquare: int, promoteTo: int = 0) -> Union[int, None]:
+        "Returns the legal move from oldSquare to newSquare (promoting to piece type promoteTo), or None"
+        return self.bySquares.get((oldSquare, newSquare, promoteTo))
+
+    def candidates(self, pieceCode: int, newSquare: int) -> List[int]:
+        "Returns the legal moves of piece code pieceCode to newSquare, usually one"
+        return self.byTarget.get((pieceCode, newSquare), [])
+
+    def san(self, m: int) -> str:
+        "Returns legal move m in standard algebraic notation, e.g. Nbd7, exd5, e8=Q+ or O-O"
+        pos = self.pos
+        fr = m & 63
+        to = (m >> 6) & 63
+        promoteTo = (m >> 12) & 7
+        flag = m >> 15
+        if flag == FLAGSHORTCASTLE:
+            out = "O-O"
+        elif flag == FLAGLONGCASTLE:
+            out = "O-O-O"
+        else:
+            p = pos.squares[fr]
+            capture = "x" if pos.squares[to] != NOPIECE or flag == FLAGENPASSANT else ""
+            if p % 6 == PAWN:
+                out = (SQUARENAMES[fr][0] + capture if capture else "") + SQUARENAMES[to]
+                if promoteTo:
+                    out += "=" + PIECENAMES[promoteTo]
+            else:
+                # Disambiguate by file if that is enough, else by rank, else by both
+                others = [o & 63 for o in self.candidates(p, to) if o != m]
+                origin = ""
+                if others:
+                    if all(o & 7 != fr & 7 for o in others):
+                        origin = SQUARENAMES[fr][0]
+                    elif all(o >> 3 != fr >> 3 for o in others):
+                        origin = SQUARENAMES[fr][1]
+                    else:
+                        origin = SQUARENAMES[fr]
+                out = PIECENAMES[p % 6] + origin + capture + SQUARENAMES[to]
+        pos.makeMove(m)
+        if pos.inCheck():
+            out += "#" if len(pos.legalMoves()) == 0 else "+"
+        pos.unmakeMove()
+        return out
+
+    def parseSan(self, san: str) -> int:
+        """Returns the legal move written in standard algebraic notation. Check, mate and annotation suffixes
+        are ignored, as is a missing or superfluous capture mark.
+
+        Raises:
+
+            ValueError -- if san is not a legal move here, or could be more than one
+        """
+        text = san.rstrip("+#!?")
+        if text in CASTLESAN:
+            flag = CASTLESAN[text]
+            for m in self.moves:
+                if m >> 15 == flag:
+                    return m
+            raise ValueError(f"Castling not legal: {san}")
+
+        match = SANPATTERN.match(text)
+        if match is None:
+            raise ValueError(f"Not a SAN move: {san}")
+        pieceName, oldFile, oldRank, _, newSquare, promoteName = match.groups()
+        pieceCode = self.pos.toMove * 6 + (PIECENAMES.index(pieceName) if pieceName else PAWN)
+        promoteTo = PIECENAMES.index(promoteName) if promoteName else 0
+        matches = [m for m in self.candidates(pieceCode, SQUAREINDEX[newSquare]) if (m >> 12) & 7 == promoteTo]
+        if oldFile:
+            matches = [m for m in matches if SQUARENAMES[m & 63][0] == oldFile]
+        if oldRank:
+            matches = [m for m in matches if SQUARENAMES[m & 63][1] == oldRank]
+        if len(matches) == 0:
+            raise ValueError(f"No legal move matches {san}")
+        if len(matches) > 1:
+            raise ValueError(f"More than one legal move matches {san}")
+        return matches[0]
@@ -0,0 +1,161 @@
+# %% Imports
+import mmap
+import random
+import struct
+from typing import Dict, Iterable, List, Tuple, TypedDict
+
+from bitboard import moveToUci, position
+
+
+# %% Constants
+# A book file is HEADER then entries sorted by key, and by times played (most first) within a key.
+# Each entry is one move seen from one position: key, move, times played, wins and draws for the side that played it.
+MAGIC = b"CBK1"
+HEADER = struct.Struct("<4sIQ")  # magic, entry size, number of entries
+ENTRY = struct.Struct("<QIIII")  # key, move, count, wins, draws
+
+
+# %% Results
+class bookEntry(TypedDict):
+    "One move of a position in the book"
+    move: int
+    count: int  # Times played
+    wins: int  # Games won by the side that played it
+    draws: int
+    winRate: float  # (wins + draws / 2) / count, from the side that played it
+
+
+# %% Writing
+def writeBook(fp: str, stats: Dict[Tuple[int, int], List[int]], minCount: int = 1) -> int:
+    """Writes move statistics to a book file.
+
+    Args:
+
+        fp (str) -- path to write
+
+        stats (dict) -- (position key, move) to [count, wins, draws]
+
+        minCount (int) -- leave out moves played fewer times. Defaults to 1.
+
+    Returns:
+
+        int -- number of entries written
+    """
+    rows = sorted(
+        ((key, move, *counts) for (key, move), counts in stats.items() if counts[0] >= minCount),
+        key=lambda r: (r[0], -r[2], r[1]),
+    )
+    return writeBookRows(fp, rows)
+
+
+def writeBookRows(fp: str, rows: Iterable[Tuple[int, int, int, int, int]]) -> int:
+    """Writes a book file from rows already in book order, one at a time, so the book never has to fit in memory.
+
+    Args:
+
+        fp (str) -- path to write
+
+        rows (iterable of tuple) -- (key, move, count, wins, draws), sorted by key then most played first
+
+    Returns:
+
+        int -- number of entries written
+    """
+    written = 0
+    with open(fp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, ENTRY.size, 0))
+        for row in rows:
+            f.write(ENTRY.pack(*row))
+            written += 1
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, ENTRY.size, written))
+    return written
+
+
+# %% Reading
+class openingBook(object):
+    """Read only view of a book file, memory mapped so opening it costs nothing and lookups are a binary search
+    over the sorted entries, O(log n) in the book size.
+
+    Args:
+
+        fp (str) -- path to a book written by writeBook
+    """
+
+    def __init__(self, fp: str):
+        self.fp = fp
+        with open(fp, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, entrySize, self.size = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or entrySize != ENTRY.size or len(self.mm) != HEADER.size + self.size * ENTRY.size:
+            self.mm.close()
+            raise ValueError(f"Not a book file, or truncated: {fp}")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"openingBook({self.fp}, entries={self.size})"
+
+    def __enter__(self) -> "openingBook":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def _key(self, i: int) -> int:
+        return struct.unpack_from("<Q", self.mm, HEADER.size + i * ENTRY.size)[0]
+
+    def probe(self, key: int) -> List[bookEntry]:
+        "Returns the book moves of the position with Zobrist key key, most played first. Empty if not in the book."
+        # Lower bound binary search for the first entry with this key
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        out: List[bookEntry] = []
+        while lo < self.size:
+            entryKey, move, count, wins, draws = ENTRY.unpack_from(self.mm, HEADER.size + lo * ENTRY.size)
+            if entryKey != key:
+                break
+            out.append(
+                {"move": move, "count": count, "wins": wins, "draws": draws, "winRate": (wins + draws / 2) / count}
+            )
+            lo += 1
+        return out
+
+    def pickMove(self, pos: position, minCount: int = 1, weighted: bool = False) -> int:
+        """Returns a book move for pos, or 0 if it is out of book.
+
+        Args:
+
+            pos (position) -- position to look up
+
+            minCount (int) -- ignore moves played fewer times. Defaults to 1.
+
+            weighted (bool) -- pick at random in proportion to times played, for variety.
+                Defaults to False (most played).
+
+        Returns:
+
+            int -- legal move, 0 if none
+        """
+        entries = [e for e in self.probe(pos.key) if e["count"] >= minCount]
+        legal = set(pos.legalMoves())
+        entries = [e for e in entries if e["move"] in legal]  # Guards against a hash collision
+        if not entries:
+            return 0
+        if weighted:
+            return random.choices([e["move"] for e in entries], weights=[e["count"] for e in entries])[0]
+        return entries[0]["move"]
+
+    def show(self, pos: position) -> None:
+        "Prints the book moves of pos"
+        for e in self.probe(pos.key):
+            print(f"{moveToUci(e['move']):<7}{e['count']:>8}{e['winRate']:>7.0%}")
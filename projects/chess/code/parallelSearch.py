@@ -0,0 +1,402 @@
+# %% Imports
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Literal, Tuple, TypedDict, Union
+
+from bitboard import position
+from moveOrdering import moveOrderer
+from perft import PERFTPOSITIONS
+from search import (
+    DEFAULTDEPTH,
+    INFINITY,
+    MATEBOUND,
+    MATESCORE,
+    MAXDEPTH,
+    SearchStopped,
+    pv2Str,
+    searchResult,
+    searcher,
+)
+from transposition import sharedTranspositionTable, transpositionTable
+
+
+# %% Constants
+TABLEMB = 16  # Table size of each root split worker, and of the shared lazy SMP table
+BENCHMARKPOSITIONS = ["start", "kiwipete", "middlegame", "endgame"]  # Names from PERFTPOSITIONS
+
+
+# %% Root splitting
+_WORKERSEARCHER: Union[searcher, None] = None  # Searcher of a root split worker process, kept between tasks
+_ROOTPOOL: Union[ProcessPoolExecutor, None] = None  # Kept between searches, see getRootPool
+_ROOTPOOLARGS: Tuple[int, float] = (0, 0.0)  # workers and sizeMb _ROOTPOOL was started with
+
+
+def _initRootWorker(sizeMb: float) -> None:
+    global _WORKERSEARCHER
+    _WORKERSEARCHER = searcher(transpositionTable(sizeMb))
+
+
+def getRootPool(workers: Union[int, None] = None, sizeMb: float = TABLEMB) -> ProcessPoolExecutor:
+    """Returns the root split process pool, starting it on first use. It lives until closeRootPool or exit,
+    so its workers and their transposition tables carry over from one search to the next.
+    Asking for a different workers or sizeMb restarts it.
+    """
+    global _ROOTPOOL, _ROOTPOOLARGS
+    workers = workers or os.cpu_count() or 1
+    if _ROOTPOOL is None or _ROOTPOOLARGS != (workers, sizeMb):
+        closeRootPool()
+        _ROOTPOOL = ProcessPoolExecutor(workers, initializer=_initRootWorker, initargs=(sizeMb,))
+        _ROOTPOOLARGS = (workers, sizeMb)
+    return _ROOTPOOL
+
+
+def closeRootPool() -> None:
+    "Stops the root split pool's processes, freeing their tables"
+    global _ROOTPOOL
+    if _ROOTPOOL is not None:
+        _ROOTPOOL.shutdown()
+        _ROOTPOOL = None
+
+
+def _searchRootMove(
+    pos: position, move: int, depth: int, deadline: Union[float, None], bound: Union[int, None] = None
+) -> Tuple[int, int, List[int], int, bool]:
+    """Searches one root move in a worker process.
+
+    Args:
+
+        deadline (float) -- time.time() to stop by, shared by all tasks of an iteration however long they queue
+
+        bound (int) -- score another root move already has. Scores at or below it are only upper bounds,
+            which is all that is needed to know this move is no better. Defaults to None (exact score).
+
+    Returns:
+
+        tuple -- move, score for the side to move at the root, principal variation starting with move,
+            nodes, and whether the full depth was searched before the deadline
+    """
+    s = _WORKERSEARCHER
+    assert s is not None, "Worker not initialised"
+    timeMs = None
+    if deadline is not None:
+        timeMs = int((deadline - time.time()) * 1000)
+        if timeMs <= 0:
+            return move, 0, [move], 0, False
+    pos.makeMove(move)
+    if s._isDraw(pos):
+        return move, 0, [move], 1, True
+
+    childBeta = INFINITY
+    if bound is not None:
+        # Beating bound from the root means scoring below -bound in the child, a ply further from any mate
+        childBeta = -bound - 1 if bound > MATEBOUND else -bound + 1 if bound < -MATEBOUND else -bound
+    if depth <= 1:
+        s.nodes = 0
+        try:
+            score, pv, nodes, complete = -s.quiesce(pos, beta=childBeta, timeMs=timeMs), [move], s.nodes, True
+        except SearchStopped:
+            return move, 0, [move], s.nodes, False
+    else:
+        result = s.search(pos, depth=depth - 1, timeMs=timeMs, beta=childBeta)
+        score, nodes = -result["score"], result["nodes"]
+        pv = [move] + (result["pv"] if result["move"] else [])
+        complete = result["move"] == 0 or result["depth"] == depth - 1 or abs(score) > MATEBOUND
+    # Mate scores are counted from the child, one ply further from the root
+    if score > MATEBOUND:
+        score -= 1
+    elif score < -MATEBOUND:
+        score += 1
+    return move, score, pv, nodes, complete
+
+
+def rootSplitSearch(
+    pos: position,
+    depth: Union[int, None] = None,
+    timeMs: Union[int, None] = None,
+    workers: Union[int, None] = None,
+    sizeMb: float = TABLEMB,
+) -> searchResult:
+    """Searches pos by handing its root moves out to a pool of processes, one move per task, deepening one ply
+    at a time. The pool is getRootPool's, so each worker keeps its own transposition table between tasks,
+    iterations and searches.
+    Each iteration first searches the previous best move alone, then the rest in parallel bounded by its score,
+    so they can be cut off as soon as they are shown to be no better. Root moves start in move ordering order.
+    If time runs out partway through an iteration, a move that finished and beat the previous best is still
+    taken, and there is always a move to play, even before depth 1 completes.
+
+    Args:
+
+        pos (position) -- position to search, unchanged on return
+
+        depth (int) -- max depth in plies. Defaults to DEFAULTDEPTH if no time budget, else MAXDEPTH.
+
+        timeMs (int) -- time budget in milliseconds. Defaults to None (no limit).
+
+        workers (int) -- processes. Defaults to None (one per CPU).
+
+        sizeMb (float) -- transposition table size per worker. Defaults to TABLEMB.
+
+    Returns:
+
+        searchResult -- as searcher.search. nodes is summed over workers, cutoff stats are not collected.
+            depth is the last iteration completed for every root move.
+    """
+    start = time.perf_counter()
+    if depth is None:
+        depth = DEFAULTDEPTH if timeMs is None else MAXDEPTH
+    deadline = None if timeMs is None else time.time() + timeMs / 1000
+    result: searchResult = {
+        "move": 0,
+        "score": 0,
+        "depth": 0,
+        "pv": [],
+        "nodes": 0,
+        "timeMs": 0,
+        "cutoffs": 0,
+        "firstMoveCutoffRate": 0.0,
+    }
+    rootMoves = pos.legalMoves()
+    if len(rootMoves) == 0:
+        result["score"] = -MATESCORE if pos.inCheck() else 0
+        return result
+    moveOrderer().orderMoves(pos, rootMoves, 0, 0)  # Captures first, so the fallback move is a sensible one
+    result["move"] = rootMoves[0]
+    result["pv"] = [rootMoves[0]]
+
+    pool = getRootPool(workers, sizeMb)
+    for d in range(1, min(depth, MAXDEPTH) + 1):
+        if deadline is not None and time.time() >= deadline:
+            break
+        first = pool.submit(_searchRootMove, pos, rootMoves[0], d, deadline).result()
+        result["nodes"] += first[3]
+        if not first[4]:  # Out of time before the previous best finished, nothing to compare against
+            break
+        others = list(
+            pool.map(_searchRootMove, repeat(pos), rootMoves[1:], repeat(d), repeat(deadline), repeat(first[1]))
+        )
+        result["nodes"] += sum(r[3] for r in others)
+        # Best first, so it is searched first next iteration. Stable, so the first move wins ties.
+        scored = sorted([first] + [r for r in others if r[4]], key=lambda r: -r[1])
+        result["move"], result["score"], result["pv"] = scored[0][0], scored[0][1], scored[0][2]
+        if not all(r[4] for r in others):  # Out of time, moves that finished and beat the first still count
+            break
+        rootMoves = [r[0] for r in scored]
+        result["depth"] = d
+        if abs(result["score"]) > MATEBOUND:
+            break
+
+    result["timeMs"] = int((time.perf_counter() - start) * 1000)
+    return result
+
+
+# %% Lazy SMP
+def _lazySmpHelper(
+    pos: position,
+    table: sharedTranspositionTable,
+    stopEvent,
+    depth: int,
+    timeMs: Union[int, None],
+    nodes: Union[int, None],
+    nodeCounts,
+) -> None:
+    "Runs one lazy SMP helper search in its own process, reporting its node count when stopped or done"
+    result = searcher(table, stopEvent).search(pos, depth=depth, timeMs=timeMs, nodes=nodes)
+    nodeCounts.put(result["nodes"])
+    table.close()
+
+
+def lazySmpSearch(
+    pos: position,
+    depth: Union[int, None] = None,
+    timeMs: Union[int, None] = None,
+    nodes: Union[int, None] = None,
+    workers: Union[int, None] = None,
+    table: Union[sharedTranspositionTable, None] = None,
+) -> searchResult:
+    """Lazy SMP: workers - 1 helper processes search the same position as this process, every other one a ply
+    deeper, all sharing one transposition table. The helpers fill the table with results the main search
+    picks up instead of searching them itself. The main search's result is returned and stops the helpers.
+
+    Args:
+
+        pos (position) -- position to search, unchanged on return
+
+        depth (int) -- max depth in plies of the main search. Defaults to DEFAULTDEPTH if no time or node budget,
+            else MAXDEPTH.
+
+        timeMs (int) -- time budget in milliseconds. Defaults to None (no limit).
+
+        nodes (int) -- node budget of each process. Defaults to None (no limit).
+
+        workers (int) -- processes, including this one. Defaults to None (one per CPU).
+
+        table (sharedTranspositionTable) -- table to share, kept between searches if given.
+            Defaults to None (a new TABLEMB table, freed on return).
+
+    Returns:
+
+        searchResult -- as searcher.search, with nodes summed over all processes
+    """
+    if depth is None:
+        depth = DEFAULTDEPTH if timeMs is None and nodes is None else MAXDEPTH
+    workers = workers or os.cpu_count() or 1
+    ownTable = table is None
+    shared = sharedTranspositionTable(TABLEMB) if table is None else table
+    stopEvent = multiprocessing.Event()
+    nodeCounts = multiprocessing.Queue()
+    helpers = [
+        multiprocessing.Process(
+            target=_lazySmpHelper,
+            args=(pos, shared, stopEvent, depth + i % 2, timeMs, nodes, nodeCounts),
+            daemon=True,
+        )
+        for i in range(1, workers)
+    ]
+    for helper in helpers:
+        helper.start()
+    try:
+        result = searcher(shared).search(pos, depth=depth, timeMs=timeMs, nodes=nodes)
+    finally:
+        stopEvent.set()
+        for helper in helpers:
+            helper.join()
+        if ownTable:
+            shared.unlink()
+    while not nodeCounts.empty():
+        result["nodes"] += nodeCounts.get()
+    return result
+
+
+# %% Dispatch
+def parallelSearch(
+    pos: position,
+    depth: Union[int, None] = None,
+    timeMs: Union[int, None] = None,
+    workers: Union[int, None] = None,
+    mode: Literal["rootSplit", "lazySmp"] = "rootSplit",
+) -> searchResult:
+    """Searches pos across workers processes with rootSplitSearch or lazySmpSearch. One worker searches in
+    this process with a fresh searcher, with no pool to start.
+
+    Args:
+
+        pos (position) -- position to search, unchanged on return
+
+        depth (int) -- max depth in plies. Defaults to None, see searcher.search.
+
+        timeMs (int) -- time budget in milliseconds. Defaults to None (no limit).
+
+        workers (int) -- processes. Defaults to None (one per CPU).
+
+        mode (str) -- "rootSplit" (default) or "lazySmp"
+
+    Returns:
+
+        searchResult
+    """
+    assert mode in ["rootSplit", "lazySmp"], f"Invalid mode: {mode}"
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return searcher(transpositionTable(TABLEMB)).search(pos, depth=depth, timeMs=timeMs)
+    if mode == "rootSplit":
+        return rootSplitSearch(pos, depth, timeMs, workers)
+    return lazySmpSearch(pos, depth, timeMs, workers=workers)
+
+
+# %% Benchmark
+class scalingResult(TypedDict):
+    "Time to search the benchmark positions to a fixed depth with one mode and worker count"
+    mode: str
+    workers: int
+    depth: int
+    nodes: int
+    seconds: float
+    nodesPerSec: int
+    speedup: float  # Single process time over this time
+
+
+def runScaling(
+    depth: int = 4,
+    workersList: Union[List[int], None] = None,
+    modes: Tuple[str, ...] = ("rootSplit", "lazySmp"),
+    positions: Union[List[str], None] = None,
+) -> List[scalingResult]:
+    """Times parallelSearch to a fixed depth over the benchmark positions for each mode and worker count.
+
+    Args:
+
+        depth (int) -- search depth. Defaults to 4.
+
+        workersList (list of int) -- worker counts. Defaults to powers of two up to the CPU count, and the CPU count.
+
+        modes (tuple of str) -- modes to time. Defaults to both.
+
+        positions (list of str) -- names from PERFTPOSITIONS. Defaults to BENCHMARKPOSITIONS.
+
+    Returns:
+
+        list of scalingResult -- the single process baseline first, then one per mode and worker count
+    """
+    cpus = os.cpu_count() or 1
+    if workersList is None:
+        workersList = sorted({1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus} | {cpus})
+    fens = dict((name, fen) for name, fen, _ in PERFTPOSITIONS)
+    names = BENCHMARKPOSITIONS if positions is None else positions
+
+    def timeSearches(mode, workers: int) -> Tuple[int, float]:
+        mode = "rootSplit" if mode == "single" else mode  # Either runs in this process with one worker
+        nodes = 0
+        start = time.perf_counter()
+        for name in names:
+            nodes += parallelSearch(position.fromFen(fens[name]), depth, workers=workers, mode=mode)["nodes"]
+        return nodes, time.perf_counter() - start
+
+    runs = [("single", 1)] + [(mode, w) for mode in modes for w in workersList if w > 1]
+    results: List[scalingResult] = []
+    for mode, workers in runs:
+        nodes, seconds = timeSearches(mode, workers)
+        results.append(
+            {
+                "mode": mode,
+                "workers": workers,
+                "depth": depth,
+                "nodes": nodes,
+                "seconds": seconds,
+                "nodesPerSec": int(nodes / seconds) if seconds > 0 else 0,
+                "speedup": results[0]["seconds"] / seconds if results and seconds > 0 else 1.0,
+            }
+        )
+    return results
+
+
+def printScaling(results: List[scalingResult]) -> None:
+    "Prints a scaling results table"
+    print(f"{'mode':<10}{'workers':>8}{'depth':>6}{'nodes':>12}{'seconds':>9}{'nodes/sec':>11}{'speedup':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['workers']:>8}{r['depth']:>6}{r['nodes']:>12}{r['seconds']:>9.2f}"
+            f"{r['nodesPerSec']:>11}{r['speedup']:>8.2f}x"
+        )
+
+
+# %% Main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel search and its scaling benchmark")
+    parser.add_argument("--depth", type=int, default=4, help="search depth")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to benchmark, default powers of two")
+    parser.add_argument("--mode", choices=["rootSplit", "lazySmp"], help="benchmark one mode only")
+    parser.add_argument("--fen", help="search this position with --mode and the first --workers instead")
+    args = parser.parse_args()
+
+    if args.fen:
+        result = parallelSearch(
+            position.fromFen(args.fen), args.depth, workers=(args.workers or [None])[0], mode=args.mode or "rootSplit"
+        )
+        print(f"depth {result['depth']} score {result['score']} nodes {result['nodes']} {result['timeMs']}ms")
+        print(f"pv {pv2Str(result['pv'])}")
+    else:
+        printScaling(runScaling(args.depth, args.workers, (args.mode,) if args.mode else ("rootSplit", "lazySmp")))
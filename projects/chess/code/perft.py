@@ -0,0 +1,223 @@
+# %% Imports
+import argparse
+import time
+import tracemalloc
+from typing import List, Tuple, TypedDict, Union
+
+from bitboard import moveToUci, position
+
+
+# %% Constants
+# (name, fen, {depth: known leaf node count}). Counts are the published reference values.
+PERFTPOSITIONS: List[Tuple[str, str, dict[int, int]]] = [
+    (
+        "start",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        {1: 20, 2: 400, 3: 8_902, 4: 197_281, 5: 4_865_609},
+    ),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        {1: 48, 2: 2_039, 3: 97_862, 4: 4_085_603},
+    ),
+    (
+        "endgame",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        {1: 14, 2: 191, 3: 2_812, 4: 43_238, 5: 674_624},
+    ),
+    (
+        "promotions",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        {1: 6, 2: 264, 3: 9_467, 4: 422_333},
+    ),
+    (
+        "talkchess",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        {1: 44, 2: 1_486, 3: 62_379, 4: 2_103_487},
+    ),
+    (
+        "middlegame",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        {1: 46, 2: 2_079, 3: 89_890, 4: 3_894_594},
+    ),
+    # En passant edge cases: discovered check along the rank, and an en passant capture that evades check
+    (
+        "enPassantPin",
+        "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+        {1: 18, 2: 92, 3: 1_670, 4: 10_138, 5: 185_429, 6: 1_134_888},
+    ),
+    (
+        "enPassantEvasion",
+        "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+        {1: 15, 2: 126, 3: 1_928, 4: 13_931, 5: 206_379, 6: 1_440_467},
+    ),
+    # Castling edge cases: single rights, and rights lost by a rook being captured
+    (
+        "shortCastle",
+        "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+        {1: 15, 2: 66, 3: 1_198, 4: 6_399, 5: 120_330, 6: 661_072},
+    ),
+    (
+        "longCastle",
+        "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+        {1: 16, 2: 71, 3: 1_286, 4: 7_418, 5: 141_077, 6: 803_711},
+    ),
+    (
+        "castleRights",
+        "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+        {1: 26, 2: 1_141, 3: 27_826, 4: 1_274_206},
+    ),
+    (
+        "castlePrevented",
+        "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+        {1: 44, 2: 1_494, 3: 50_509, 4: 1_720_476},
+    ),
+    # Promotion edge case: underpromotion capture that gives check
+    (
+        "underpromotion",
+        "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+        {1: 11, 2: 133, 3: 1_442, 4: 19_174, 5: 266_199, 6: 3_821_001},
+    ),
+]
+
+
+# %% Perft
+def perft(pos: position, depth: int) -> int:
+    """Counts leaf nodes of the legal move tree depth plies deep, the standard move generator correctness check.
+
+    Args:
+
+        pos (position) -- position to count from. Made/unmade in place, unchanged on return.
+
+        depth (int) -- plies to count
+
+    Returns:
+
+        int -- number of leaf nodes
+    """
+    if depth <= 0:
+        return 1
+    moves = pos.legalMoves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for m in moves:
+        pos.makeMove(m)
+        nodes += perft(pos, depth - 1)
+        pos.unmakeMove()
+    return nodes
+
+
+def divide(pos: position, depth: int) -> dict[str, int]:
+    """Perft split by root move, for finding which move a generator bug hides under.
+
+    Returns:
+
+        dict -- long algebraic move (e.g. e2e4) to leaf node count below it
+    """
+    out = {}
+    for m in pos.legalMoves():
+        pos.makeMove(m)
+        out[moveToUci(m)] = perft(pos, depth - 1)
+        pos.unmakeMove()
+    return out
+
+
+# %% Benchmark
+class benchmarkResult(TypedDict):
+    "Result of one perft benchmark run"
+    name: str
+    depth: int
+    nodes: int
+    expected: Union[int, None]  # Known count, None if not published for this depth
+    seconds: float
+    nodesPerSec: int
+    peakMemKb: Union[int, None]  # Peak traced allocation while counting, None if not measured
+
+
+def runBenchmark(
+    maxDepth: int = 4,
+    positions: Union[List[Tuple[str, str, dict[int, int]]], None] = None,
+    measureMemory: bool = True,
+) -> List[benchmarkResult]:
+    """Runs perft on each position to its deepest known depth up to maxDepth, timing it and checking the count.
+
+    Args:
+
+        maxDepth (int) -- deepest depth to run. Defaults to 4.
+
+        positions (list of tuple) -- (name, fen, {depth: nodes}). Defaults to PERFTPOSITIONS.
+
+        measureMemory (bool) -- also record peak memory. Runs each count a second time under tracemalloc,
+            since tracing slows allocation down too much to time alongside. Defaults to True.
+
+    Returns:
+
+        list of benchmarkResult -- one per position, in order
+    """
+    positions = PERFTPOSITIONS if positions is None else positions
+    results: List[benchmarkResult] = []
+    for name, fen, known in positions:
+        depth = max([d for d in known if d <= maxDepth], default=maxDepth)
+        pos = position.fromFen(fen)
+        start = time.perf_counter()
+        nodes = perft(pos, depth)
+        seconds = time.perf_counter() - start
+
+        peakMemKb = None
+        if measureMemory:
+            tracemalloc.start()
+            perft(pos, depth)
+            peakMemKb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+
+        results.append(
+            {
+                "name": name,
+                "depth": depth,
+                "nodes": nodes,
+                "expected": known.get(depth),
+                "seconds": seconds,
+                "nodesPerSec": int(nodes / seconds) if seconds > 0 else 0,
+                "peakMemKb": peakMemKb,
+            }
+        )
+    return results
+
+
+def printBenchmark(results: List[benchmarkResult]) -> bool:
+    "Prints a results table and returns True if every count with a known value matched"
+    allOk = True
+    print(f"{'position':<18}{'depth':>6}{'nodes':>12}{'nodes/sec':>12}{'peak kb':>10}  check")
+    for r in results:
+        if r["expected"] is None:
+            check = "-"
+        elif r["nodes"] == r["expected"]:
+            check = "ok"
+        else:
+            check = f"FAIL (expected {r['expected']})"
+            allOk = False
+        peak = "-" if r["peakMemKb"] is None else r["peakMemKb"]
+        print(f"{r['name']:<18}{r['depth']:>6}{r['nodes']:>12}{r['nodesPerSec']:>12}{peak:>10}  {check}")
+    totalNodes = sum(r["nodes"] for r in results)
+    totalSeconds = sum(r["seconds"] for r in results)
+    print(f"Total {totalNodes} nodes in {totalSeconds:.2f}s, {int(totalNodes / totalSeconds)} nodes/sec")
+    return allOk
+
+
+# %% Main
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perft move generator check and benchmark")
+    parser.add_argument("--depth", type=int, default=4, help="deepest depth to run")
+    parser.add_argument("--fen", help="run a divide on this position instead of the benchmark")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory pass")
+    args = parser.parse_args()
+
+    if args.fen:
+        counts = divide(position.fromFen(args.fen), args.depth)
+        for move, count in sorted(counts.items()):
+            print(f"{move}: {count}")
+        print(f"Total: {sum(counts.values())}")
+    else:
+        ok = printBenchmark(runBenchmark(args.depth, measureMemory=not args.no_memory))
+        raise SystemExit(0 if ok else 1)
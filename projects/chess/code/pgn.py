@@ -0,0 +1,127 @@
+# %% Imports
+import bz2
+import gzip
+import re
+from typing import IO, Iterator, List, TypedDict, Union
+
+
+# %% Constants
+HEADERPATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+MOVENUMBERPATTERN = re.compile(r"^\d+\.+")  # 12. or 12... possibly glued to the move, e.g. 12.e4
+ANNOTATIONCHARS = "!?"
+
+
+# %% Results
+class pgnGame(TypedDict):
+    "One game read from a PGN file"
+    headers: dict[str, str]  # Tag pairs, e.g. Event, White, Result
+    moves: List[str]  # SAN moves of the main line, comments, variations and annotations removed
+    result: str  # 1-0, 0-1, 1/2-1/2 or * (unknown)
+
+
+# %% Reading
+def openPgn(fp: str) -> IO[str]:
+    "Opens a PGN file as text, decompressing .gz and .bz2 files on the fly"
+    if fp.endswith(".gz"):
+        return gzip.open(fp, "rt", encoding="utf-8", errors="replace")
+    if fp.endswith(".bz2"):
+        return bz2.open(fp, "rt", encoding="utf-8", errors="replace")
+    return open(fp, "rt", encoding="utf-8", errors="replace")
+
+
+def readPgn(source: Union[str, IO[str]], limit: Union[int, None] = None) -> Iterator[pgnGame]:
+    """Yields the games of a PGN file one at a time, so memory stays bounded by the longest game
+    however large the file is.
+
+    Args:
+
+        source (str or file) -- path to a .pgn, .pgn.gz or .pgn.bz2 file, or an open text file
+
+        limit (int) -- stop after this many games. Defaults to None (whole file).
+
+    Returns:
+
+        iterator of pgnGame
+    """
+    if isinstance(source, str):
+        with openPgn(source) as f:
+            yield from readPgn(f, limit)
+        return
+
+    count = 0
+    headers: dict[str, str] = {}
+    tokens: List[str] = []
+    inMoves = False
+    commentDepth = 0  # Inside {...}, which can span lines
+    variationDepth = 0  # Inside (...), which can nest
+    for line in source:
+        line = line.strip()
+
+        # A tag pair after movetext starts the next game
+        if commentDepth == 0 and line.startswith("["):
+            match = HEADERPATTERN.match(line)
+            if match:
+                if inMoves:
+                    yield _finishGame(headers, tokens)
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+                    headers, tokens, inMoves = {}, [], False
+                headers[match.group(1)] = match.group(2).replace('\\"', '"')
+                continue
+        if not line or line.startswith("%"):
+            continue
+
+        inMoves = True
+        if commentDepth == 0 and variationDepth == 0 and not any(ch in line for ch in "{;()"):
+            tokens.extend(line.split())  # Plain movetext, no need to walk it character by character
+        else:
+            token = ""
+            for ch in line + " ":
+                if commentDepth:
+                    if ch == "}":
+                        commentDepth = 0
+                    continue
+                if ch.isspace() or ch in "{;()":
+                    if token and variationDepth == 0:
+                        tokens.append(token)
+                    token = ""
+                    if ch == "{":
+                        commentDepth = 1
+                    elif ch == ";":  # Rest of line comment
+                        break
+                    elif ch == "(":
+                        variationDepth += 1
+                    elif ch == ")":
+                        variationDepth = max(0, variationDepth - 1)
+                else:
+                    token += ch
+
+        # Game ends at its result
+        if tokens and tokens[-1] in RESULTS and commentDepth == 0 and variationDepth == 0:
+            yield _finishGame(headers, tokens)
+            count += 1
+            if limit is not None and count >= limit:
+                return
+            headers, tokens, inMoves = {}, [], False
+
+    if inMoves or headers:
+        yield _finishGame(headers, tokens)
+
+
+def _finishGame(headers: dict[str, str], tokens: List[str]) -> pgnGame:
+    "Turns raw movetext tokens into SAN moves"
+    result = headers.get("Result", "*")
+    moves = []
+    for token in tokens:
+        if token in RESULTS:
+            result = token
+            continue
+        token = MOVENUMBERPATTERN.sub("", token)
+        if not token or token[0] == "$":  # Bare move number or numeric annotation
+            continue
+        token = token.rstrip(ANNOTATIONCHARS)
+        if token:
+            moves.append(token)
+    return {"headers": headers, "moves": moves, "result": result}
@@ -0,0 +1,349 @@
+# %% Imports
+import time
+from typing import Callable, List, TypedDict, Union
+
+from bitboard import moveToUci, position
+from evaluation import evaluate, see
+from moveOrdering import MAXPLY, moveOrderer
+from transposition import BOUNDEXACT, BOUNDLOWER, BOUNDUPPER, transpositionTable
+
+
+# %% Constants
+INFINITY = 1_000_000
+MATESCORE = 100_000  # Mate in n plies scores MATESCORE - n
+MATEBOUND = MATESCORE - 1_000  # Scores beyond this are mates
+MAXDEPTH = 64
+DEFAULTDEPTH = 4  # Used when neither a depth nor a time budget is given
+CHECKEVERY = 1023  # Check time/node/stop limits when nodes & CHECKEVERY == 0
+
+
+# %% Exceptions
+class SearchStopped(Exception):
+    "Raised inside the search when a limit is hit, to unwind to the root"
+    pass
+
+
+# %% Results
+class searchResult(TypedDict):
+    "Result of a search"
+    move: int  # Best move, 0 if there are no legal moves
+    score: int  # Centipawns from the side to move's perspective
+    depth: int  # Last fully completed iteration
+    pv: List[int]  # Principal variation, starting with move
+    nodes: int
+    timeMs: int
+    cutoffs: int  # Beta cutoffs
+    firstMoveCutoffRate: float  # Share of cutoffs caused by the first move searched, a measure of move ordering
+
+
+# %% Mate score helpers
+def scoreToTable(score: int, ply: int) -> int:
+    "Mate scores are stored relative to the node rather than the root, so they stay valid when transposed"
+    if score > MATEBOUND:
+        return score + ply
+    if score < -MATEBOUND:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score: int, ply: int) -> int:
+    if score > MATEBOUND:
+        return score - ply
+    if score < -MATEBOUND:
+        return score + ply
+    return score
+
+
+# %% Searcher
+class searcher(object):
+    """Negamax alpha-beta search with iterative deepening over a bitboard position.
+
+    Args:
+
+        table (transpositionTable) -- shared table. Defaults to a new 16MB table.
+
+        stopEvent (Event) -- stops the search when set, e.g. a multiprocessing.Event set by another process.
+            Defaults to None.
+    """
+
+    def __init__(self, table: Union[transpositionTable, None] = None, stopEvent=None):
+        self.table = table if table is not None else transpositionTable()
+        self.stopEvent = stopEvent
+        self.orderer = moveOrderer()
+        self.nodes = 0
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.stopped = False
+        self.deadline: float | None = None
+        self.nodeLimit: int | None = None
+        self.pvTable: list[list[int]] = [[] for _ in range(MAXPLY + 1)]
+        self.rootHistory = 0
+
+    def stop(self) -> None:
+        "Asks a running search to return as soon as possible. Safe to call from another thread."
+        self.stopped = True
+
+    def search(
+        self,
+        pos: position,
+        depth: Union[int, None] = None,
+        timeMs: Union[int, None] = None,
+        nodes: Union[int, None] = None,
+        alpha: int = -INFINITY,
+        beta: int = INFINITY,
+        onIteration: Union[Callable[[searchResult], None], None] = None,
+    ) -> searchResult:
+        """Searches pos, deepening one ply at a time until depth, time or node budget runs out.
+
+        Args:
+
+            pos (position) -- position to search. Made/unmade in place, unchanged on return.
+
+            depth (int) -- max depth in plies. Defaults to DEFAULTDEPTH if no time or node budget, else MAXDEPTH.
+
+            timeMs (int) -- time budget in milliseconds. Defaults to None (no limit).
+
+            nodes (int) -- node budget. Defaults to None (no limit).
+
+            alpha (int) -- lower bound of the root window. A score at or below it is only an upper bound.
+                Defaults to -INFINITY.
+
+            beta (int) -- upper bound of the root window. A score at or above it is only a lower bound.
+                Defaults to INFINITY.
+
+            onIteration (function) -- called with the result so far after each completed iteration,
+                e.g. to print progress. Defaults to None.
+
+        Returns:
+
+            searchResult -- best move, score, completed depth, principal variation and stats
+        """
+        start = time.perf_counter()
+        if depth is None:
+            depth = DEFAULTDEPTH if timeMs is None and nodes is None else MAXDEPTH
+        self.deadline = None if timeMs is None else start + timeMs / 1000
+        self.nodeLimit = nodes
+        self.nodes = 0
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.stopped = False
+        self.rootHistory = len(pos.history)
+        self.table.newSearch()
+        self.orderer.newSearch()
+
+        result: searchResult = {
+            "move": 0,
+            "score": 0,
+            "depth": 0,
+            "pv": [],
+            "nodes": 0,
+            "timeMs": 0,
+            "cutoffs": 0,
+            "firstMoveCutoffRate": 0.0,
+        }
+        rootMoves = pos.legalMoves()
+        if len(rootMoves) == 0:
+            result["score"] = -MATESCORE if pos.inCheck() else 0
+            return result
+        result["move"] = rootMoves[0]
+        result["pv"] = [rootMoves[0]]
+
+        for d in range(1, min(depth, MAXDEPTH) + 1):
+            try:
+                score = self._negamax(pos, d, alpha, beta, 0)
+            except SearchStopped:
+                # Unwind whatever the interrupted iteration left made, keep the last completed result
+                while len(pos.history) > self.rootHistory:
+                    pos.unmakeMove()
+                break
+            result["score"] = score
+            result["depth"] = d
+            if self.pvTable[0]:  # Empty when every move failed low against alpha
+                result["pv"] = self.pvTable[0][:]
+                result["move"] = result["pv"][0]
+            if onIteration is not None:
+                result["nodes"] = self.nodes
+                result["timeMs"] = int((time.perf_counter() - start) * 1000)
+                onIteration(result)
+            if abs(score) > MATEBOUND:  # Forced mate found, deeper search cannot improve it
+                break
+
+        result["nodes"] = self.nodes
+        result["timeMs"] = int((time.perf_counter() - start) * 1000)
+        result["cutoffs"] = self.cutoffs
+        result["firstMoveCutoffRate"] = self.firstMoveCutoffs / self.cutoffs if self.cutoffs else 0.0
+        return result
+
+    def quiesce(
+        self, pos: position, alpha: int = -INFINITY, beta: int = INFINITY, timeMs: Union[int, None] = None
+    ) -> int:
+        """Returns the quiescence search score of pos from the side to move's perspective.
+
+        Args:
+
+            pos (position) -- position to score
+
+            alpha (int) -- lower bound of the window. Defaults to -INFINITY.
+
+            beta (int) -- upper bound of the window. Defaults to INFINITY.
+
+            timeMs (int) -- time budget in milliseconds. Out of time raises SearchStopped, with pos left partway
+                through a line for the caller to unwind or discard. Defaults to None (no limit).
+
+        Returns:
+
+            int -- score, only a bound if outside the window
+        """
+        self.deadline = None if timeMs is None else time.perf_counter() + timeMs / 1000
+        self.nodeLimit = None
+        self.stopped = False
+        return self._quiescence(pos, alpha, beta, 0)
+
+    def _checkLimits(self) -> None:
+        if self.stopped:
+            raise SearchStopped()
+        if self.stopEvent is not None and self.stopEvent.is_set():
+            self.stopped = True
+            raise SearchStopped()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = True
+            raise SearchStopped()
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            self.stopped = True
+            raise SearchStopped()
+
+    def _isDraw(self, pos: position) -> bool:
+        "Fifty move rule, or the position repeated since the last capture or pawn move"
+        if pos.halfmoveClock >= 100:
+            return True
+        history = pos.history
+        key = pos.key
+        # history[i][5] is the key before move i, only positions with the same side to move can repeat
+        for i in range(len(history) - 2, max(-1, len(history) - 1 - pos.halfmoveClock), -2):
+            if history[i][5] == key:
+                return True
+        return False
+
+    def _negamax(self, pos: position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        "Returns score of pos from the side to move's perspective, searched depth plies"
+        self.nodes += 1
+        if self.nodes & CHECKEVERY == 0:
+            self._checkLimits()
+        self.pvTable[ply] = []
+
+        if ply > 0 and self._isDraw(pos):
+            return 0
+
+        # Transposition table cutoff
+        alphaOriginal = alpha
+        ttMove = 0
+        entry = self.table.probe(pos.key)
+        if entry is not None:
+            entryDepth, entryScore, bound, ttMove = entry
+            if ply > 0 and entryDepth >= depth:
+                entryScore = scoreFromTable(entryScore, ply)
+                if bound == BOUNDEXACT:
+                    if alpha < entryScore < beta:  # Lands in the parent's PV, so rebuild the line below from the table
+                        self.pvTable[ply] = self._tablePv(pos, ttMove, entryDepth)
+                    return entryScore
+                if bound == BOUNDLOWER and entryScore >= beta:
+                    return entryScore
+                if bound == BOUNDUPPER and entryScore <= alpha:
+                    return entryScore
+
+        if depth <= 0 or ply >= MAXPLY:
+            return self._quiescence(pos, alpha, beta, ply)
+
+        moves = pos.legalMoves()
+        if len(moves) == 0:
+            return -MATESCORE + ply if pos.inCheck() else 0
+
+        self.orderer.orderMoves(pos, moves, ttMove, ply)
+
+        best = -INFINITY
+        bestMove = 0
+        for i, m in enumerate(moves):
+            pos.makeMove(m)
+            score = -self._negamax(pos, depth - 1, -beta, -alpha, ply + 1)
+            pos.unmakeMove()
+            if score > best:
+                best = score
+                bestMove = m
+                if score > alpha:
+                    alpha = score
+                    self.pvTable[ply] = [m] + self.pvTable[ply + 1]
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        if i == 0:
+                            self.firstMoveCutoffs += 1
+                        if self.orderer.isQuiet(pos, m):
+                            self.orderer.updateCutoff(pos, m, depth, ply)
+                        break
+
+        if best <= alphaOriginal:
+            bound = BOUNDUPPER
+        elif best >= beta:
+            bound = BOUNDLOWER
+        else:
+            bound = BOUNDEXACT
+        self.table.store(pos.key, depth, scoreToTable(best, ply), bound, bestMove)
+        return best
+
+    def _tablePv(self, pos: position, move: int, maxLength: int) -> list[int]:
+        "Returns the line of stored best moves from pos, starting with move, at most maxLength long"
+        pv: list[int] = []
+        while move and len(pv) < maxLength and move in pos.legalMoves():
+            pos.makeMove(move)
+            pv.append(move)
+            if self._isDraw(pos):
+                break
+            entry = self.table.probe(pos.key)
+            move = entry[3] if entry is not None else 0
+        for _ in pv:
+            pos.unmakeMove()
+        return pv
+
+    def _quiescence(self, pos: position, alpha: int, beta: int, ply: int) -> int:
+        """Searches captures and promotions only until the position is quiet, so the horizon never lands mid-exchange.
+        Captures that lose material by static exchange evaluation are skipped. When in check every evasion is tried.
+        """
+        self.nodes += 1
+        if self.nodes & CHECKEVERY == 0:
+            self._checkLimits()
+        if ply >= MAXPLY:
+            return evaluate(pos)
+
+        inCheck = pos.inCheck()
+        if inCheck:
+            best = -INFINITY
+            moves = pos.legalMoves()
+            if len(moves) == 0:
+                return -MATESCORE + ply
+        else:
+            # Stand pat - the side to move can usually do at least as well as the static score
+            best = evaluate(pos)
+            if best >= beta:
+                return best
+            if best > alpha:
+                alpha = best
+            moves = pos.legalMoves(capturesOnly=True)
+
+        self.orderer.orderMoves(pos, moves, 0, ply)
+        for m in moves:
+            if not inCheck and not (m >> 12) & 7 and see(pos, m) < 0:
+                continue
+            pos.makeMove(m)
+            score = -self._quiescence(pos, -beta, -alpha, ply + 1)
+            pos.unmakeMove()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+
+def pv2Str(pv: List[int]) -> str:
+    "Returns a principal variation as space-separated moves in long algebraic notation"
+    return " ".join(moveToUci(m) for m in pv)
@@ -0,0 +1,6 @@
+# %% Imports
+import os
+import sys
+
+# The engine modules are flat siblings imported by name, as when run from projects/chess/code
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,108 @@
+# %% Imports
+import sqlite3
+
+import chessClasses as cc
+
+
+# %% Constants
+# Two different over the board games played at the same place, so Site is a place name rather than a game URL
+PGN = """[Event "Club Championship"]
+[Site "London ENG"]
+[Date "2024.01.01"]
+[Round "1"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+[Event "Club Championship"]
+[Site "London ENG"]
+[Date "2024.01.01"]
+[Round "2"]
+[White "C"]
+[Black "D"]
+[Result "1/2-1/2"]
+
+1. d4 d5 2. c4 e6 1/2-1/2
+"""
+
+
+# %% Tests
+def test_pgnGame2RowIdFromGameUrl():
+    game = {"headers": {"Site": "https://lichess.org/abcd1234"}, "moves": ["e4"], "result": "*"}
+    assert cc.pgnGame2Row(game, 1)["id"] == "abcd1234"
+
+
+def test_pgnGame2RowIdNotFromPlaceName():
+    game = {"headers": {"Site": "London ENG"}, "moves": ["e4"], "result": "*"}
+    gameId = cc.pgnGame2Row(game, 1)["id"]
+    assert gameId.startswith("pgn") and gameId == cc.pgnGame2Row(game, 7)["id"]
+
+
+def test_ingestPgnGamesSharingSite(tmp_path):
+    fp = tmp_path / "games.pgn"
+    fp.write_text(PGN)
+    dbPath = str(tmp_path / "chess.db")
+    cc.createMovesTable(dbPath)
+    cc.createGamesTable(dbPath)
+
+    assert cc.ingestPgn(str(fp), workers=1, dbPath=dbPath) == 2
+    with sqlite3.connect(dbPath) as con:
+        gameIds = [r[0] for r in con.execute("select gameId from games")]
+        moves = con.execute("select count(*) from moves").fetchone()[0]
+    con.close()
+    assert len(set(gameIds)) == 2
+    assert moves == 7 + 4
+
+    # Rerunning skips both games rather than clashing with them
+    assert cc.ingestPgn(str(fp), workers=1, dbPath=dbPath) == 0
+
+
+def test_ingestPgnRepeatedGame(tmp_path):
+    # The first game three times over, once in the same chunk and once in a later one
+    fp = tmp_path / "games.pgn"
+    first = PGN.split("\n\n[Event")[0] + "\n\n"
+    fp.write_text(first * 3)
+    dbPath = str(tmp_path / "chess.db")
+    cc.createMovesTable(dbPath)
+    cc.createGamesTable(dbPath)
+
+    assert cc.ingestPgn(str(fp), chunkSize=2, workers=1, dbPath=dbPath) == 1
+    with sqlite3.connect(dbPath) as con:
+        assert con.execute("select count(*) from games").fetchone()[0] == 1
+    con.close()
+
+
+def test_ingestPgnWritesCompactMoves(tmp_path):
+    # Adds a game with an en passant capture and castling, the state the compact boards keep beyond the squares
+    fp = tmp_path / "games.pgn"
+    fp.write_text(PGN + '\n[Site "?"]\n[Result "*"]\n\n1. e4 Nf6 2. e5 d5 3. exd6 Bf5 4. Nf3 e6 5. Bd3 Be7 6. O-O O-O *\n')
+    compactPath, migratedPath = str(tmp_path / "compact.db"), str(tmp_path / "migrated.db")
+    for dbPath in (compactPath, migratedPath):
+        cc.createMovesTable(dbPath)
+        cc.createGamesTable(dbPath)
+    cc.createCompactTables(compactPath)
+
+    # Written while ingesting, the compact rows match those migrated from the text tables
+    assert cc.ingestPgn(str(fp), workers=1, dbPath=compactPath) == 3
+    assert cc.ingestPgn(str(fp), workers=1, dbPath=migratedPath) == 3
+    cc.migrateToCompact(migratedPath)
+    rows = []
+    for dbPath in (compactPath, migratedPath):
+        with sqlite3.connect(dbPath) as con:
+            rows.append(con.execute("select * from movesCompact order by gameId, moveNum").fetchall())
+        con.close()
+    assert len(rows[0]) == 7 + 4 + 12
+    assert rows[0] == rows[1]
+
+    # With the text tables dropped, ingesting only writes compact rows
+    cc.migrateToCompact(migratedPath, dropOld=True)
+    with sqlite3.connect(migratedPath) as con:
+        con.execute("delete from games")
+        con.execute("delete from movesCompact")
+    con.close()
+    assert cc.ingestPgn(str(fp), workers=1, dbPath=migratedPath) == 3
+    with sqlite3.connect(migratedPath) as con:
+        assert con.execute("select * from movesCompact order by gameId, moveNum").fetchall() == rows[0]
+    con.close()
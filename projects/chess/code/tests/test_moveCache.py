@@ -0,0 +1,62 @@
+# %% Imports
+import random
+import tracemalloc
+
+import chessClasses as cc
+
+
+# %% Helpers
+def randomPositions(n: int, seed: int = 0) -> list:
+    "Positions from random games, restarting from the start position when a game ends"
+    rng = random.Random(seed)
+    pos = cc.position.startPosition()
+    out = []
+    while len(out) < n:
+        moves = pos.legalMoves()
+        if not moves or len(pos.history) > 200:
+            pos = cc.position.startPosition()
+            continue
+        pos.makeMove(rng.choice(moves))
+        out.append(pos.copy())
+    return out
+
+
+# %% Tests
+def test_validMovesMatchGeneration():
+    cache = cc.moveCache()
+    for pos in randomPositions(200):
+        fresh = [cc.moveInt2Dict(pos, m) for m in pos.legalMoves()]
+        assert cache.validMoves(pos) == fresh
+        assert cache.validMoves(pos) == fresh  # From the cache this time
+    assert cache.hits == 200
+
+
+def test_validMovesReturnsCopies():
+    cache = cc.moveCache()
+    pos = cc.position.startPosition()
+    moves = cache.validMoves(pos)
+    moves[0]["special"] = "changed"
+    moves.clear()
+    again = cache.validMoves(pos)
+    assert len(again) == 20 and again[0]["special"] is None
+
+
+def test_memoryPerEntry():
+    positions = randomPositions(3000)
+    cache = cc.moveCache()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for pos in positions:
+        cache.validMoves(pos)
+    perEntry = (tracemalloc.get_traced_memory()[0] - before) / len(cache)
+    tracemalloc.stop()
+    assert perEntry < 600, f"{perEntry:.0f} bytes per entry"
+    assert abs(cache.bytes / len(cache) - perEntry) < 200  # The budget's estimate is close to what is allocated
+
+
+def test_memoryBudget():
+    cache = cc.moveCache(maxMb=0.1)
+    for pos in randomPositions(3000):
+        cache.validMoves(pos)
+        assert cache.bytes <= cache.maxBytes
+    assert len(cache) < cache.misses
@@ -0,0 +1,171 @@
+# %% Imports
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal, Tuple, Union
+
+
+# %% Constants
+# Bound types of a stored score
+BOUNDNONE = 0
+BOUNDEXACT = 1
+BOUNDLOWER = 2  # Score is at least this (search failed high)
+BOUNDUPPER = 3  # Score is at most this (search failed low)
+
+ENTRYBYTES = 16  # One unsigned 64-bit key and one signed 64-bit packed data word per slot
+WORDMASK = (1 << 64) - 1
+
+# The key slot holds key ^ data, so a slot half written by another process (see sharedTranspositionTable)
+# fails the key check instead of returning another position's data. An empty slot is all zeros.
+
+# Packed data word: move (18 bits) | bound (2 bits) | depth (8 bits) | generation (4 bits) | score (upper 32 bits)
+MOVEMASK = (1 << 18) - 1
+
+
+# %% Transposition table
+class transpositionTable(object):
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+    Memory does not grow past the budget set at creation; entries are replaced per policy.
+
+    Args:
+
+        sizeMb (float) -- memory budget in megabytes. Rounded down to a power of two number of entries.
+
+        policy (str) -- "depth" (default) keeps deeper results from the current search over shallower ones,
+            "always" overwrites on every store
+    """
+
+    def __init__(self, sizeMb: float = 16, policy: Literal["depth", "always"] = "depth"):
+        assert policy in ["depth", "always"], f"Invalid policy: {policy}"
+        entries = max(1, int(sizeMb * 1024 * 1024) // ENTRYBYTES)
+        self.sizeMb = sizeMb
+        self.size: int = 1 << (entries.bit_length() - 1)
+        self.mask: int = self.size - 1
+        self.policy = policy
+        self.generation: int = 0
+        self._allocate()
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"transpositionTable(size={self.size}, policy={self.policy}, hits={self.hits}/{self.probes})"
+
+    def _allocate(self) -> None:
+        self.keys = array("Q", [0]) * self.size
+        self.data = array("q", [0]) * self.size
+
+    def clear(self) -> None:
+        "Empties the table, keeping its size"
+        self._allocate()
+        self.generation = 0
+
+    def newSearch(self) -> None:
+        "Marks the start of a new search, so depth-preferred replacement can age out old entries"
+        self.generation = (self.generation + 1) & 15
+
+    def probe(self, key: int) -> Union[Tuple[int, int, int, int], None]:
+        """Looks up key.
+
+        Returns:
+
+            tuple of int -- (depth, score, bound, move) if key is stored, else None
+        """
+        self.probes += 1
+        idx = key & self.mask
+        d = self.data[idx]
+        if self.keys[idx] ^ (d & WORDMASK) != key:
+            return None
+        self.hits += 1
+        return (d >> 20) & 255, d >> 32, (d >> 18) & 3, d & MOVEMASK
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int = 0) -> None:
+        """Stores a search result for key, subject to the replacement policy.
+
+        Args:
+
+            key (int) -- Zobrist hash of the position
+
+            depth (int) -- remaining depth the score was searched to, 0..255
+
+            score (int) -- score from the perspective of the side to move
+
+            bound (int) -- BOUNDEXACT, BOUNDLOWER or BOUNDUPPER
+
+            move (int) -- best move found, 0 if none
+        """
+        idx = key & self.mask
+        d = self.data[idx]
+        storedKey = self.keys[idx] ^ (d & WORDMASK)
+        if storedKey != 0 and self.policy == "depth":
+            sameSearch = (d >> 28) & 15 == self.generation
+            if storedKey == key:
+                # Keep the old best move if we have none, and never replace a deeper result with a bound
+                if move == 0:
+                    move = d & MOVEMASK
+                if sameSearch and depth < (d >> 20) & 255 and bound != BOUNDEXACT:
+                    return
+            elif sameSearch and depth < (d >> 20) & 255:
+                return
+        if storedKey != 0 and storedKey != key:
+            self.overwrites += 1
+        self.stores += 1
+        depth = max(0, min(depth, 255))
+        d = (score << 32) | (self.generation << 28) | (depth << 20) | (bound << 18) | move
+        self.data[idx] = d
+        self.keys[idx] = key ^ (d & WORDMASK)
+
+    def hashfull(self) -> int:
+        "Permille of the first 1000 slots in use, the usual UCI fill estimate"
+        sample = min(1000, self.size)
+        return sum(1 for i in range(sample) if self.keys[i] != 0 or self.data[i] != 0) * 1000 // sample
+
+
+class sharedTranspositionTable(transpositionTable):
+    """transpositionTable held in shared memory, so search processes running in parallel (lazy SMP) share results.
+    Create it in the parent process and pass it to the workers, which attach to the same memory when unpickled.
+    There is no locking. Racing writes can lose an entry, but never mix two positions' data, see WORDMASK.
+    The parent should call unlink once every process is done with it.
+
+    Args:
+
+        sizeMb (float) -- memory budget in megabytes, see transpositionTable
+
+        policy (str) -- replacement policy, see transpositionTable
+
+        name (str) -- name of existing shared memory to attach to. Defaults to None (create new memory).
+    """
+
+    def __init__(self, sizeMb: float = 16, policy: Literal["depth", "always"] = "depth", name: Union[str, None] = None):
+        self.name = name
+        super().__init__(sizeMb, policy)
+
+    def __reduce__(self):
+        return (sharedTranspositionTable, (self.sizeMb, self.policy, self.shm.name))
+
+    def _allocate(self) -> None:
+        if getattr(self, "shm", None) is not None:
+            self.shm.buf[: self.size * ENTRYBYTES] = bytes(self.size * ENTRYBYTES)
+            return
+        if self.name is None:
+            self.shm = SharedMemory(create=True, size=self.size * ENTRYBYTES)
+        else:
+            self.shm = SharedMemory(name=self.name)
+        self.name = self.shm.name
+        half = self.size * ENTRYBYTES // 2
+        self.keys = self.shm.buf[:half].cast("Q")
+        self.data = self.shm.buf[half : 2 * half].cast("q")
+
+    def close(self) -> None:
+        "Detaches this process from the shared memory"
+        self.keys.release()
+        self.data.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        "Detaches and frees the shared memory. Call once, from the process that created it."
+        self.close()
+        self.shm.unlink()
@@ -0,0 +1,205 @@
+# %% Imports
+import sys
+import threading
+from typing import IO, Iterable, List, Union
+
+from bitboard import COLORNAMES, moveToUci, position
+from search import MATEBOUND, MATESCORE, MAXDEPTH, pv2Str, searchResult, searcher
+from transposition import transpositionTable
+
+
+# %% Constants
+ENGINENAME = "chessClasses"
+ENGINEAUTHOR = "public/projects/chess"
+DEFAULTHASHMB = 16
+MAXHASHMB = 4096
+MOVESTOGO = 30  # Moves left assumed when the GUI sends a clock but no movestogo
+MOVEOVERHEADMS = 30  # Kept back from every clock budget for GUI and pipe latency
+
+
+# %% Helpers
+def scoreToUci(score: int) -> str:
+    "Returns a search score as a UCI score, cp <centipawns> or mate <moves>, negative if getting mated"
+    if score > MATEBOUND:
+        return f"mate {(MATESCORE - score + 1) // 2}"
+    if score < -MATEBOUND:
+        return f"mate -{(MATESCORE + score + 1) // 2}"
+    return f"cp {score}"
+
+
+def clockBudgetMs(timeLeft: int, increment: int, movesToGo: Union[int, None]) -> int:
+    "Returns how long to think for a move, given the clock in milliseconds"
+    budget = timeLeft // (movesToGo or MOVESTOGO) + increment * 3 // 4 - MOVEOVERHEADMS
+    return max(10, min(budget, timeLeft // 2))
+
+
+# %% Engine
+class uciEngine(object):
+    """Speaks the Universal Chess Interface, keeping one position, searcher and transposition table warm between
+    commands. Searches run on a background thread, so stop and isready are answered while searching.
+    Only needs the bitboard engine, not chessClasses.
+
+    Args:
+
+        out (file) -- where replies go. Defaults to None (sys.stdout).
+    """
+
+    def __init__(self, out: Union[IO[str], None] = None):
+        self.out = out if out is not None else sys.stdout
+        self.stopEvent = threading.Event()
+        self.searcher = searcher(transpositionTable(DEFAULTHASHMB), self.stopEvent)
+        self.position = position.startPosition()
+        self.thread: Union[threading.Thread, None] = None
+        self.outLock = threading.Lock()  # Search thread and command loop both write to out
+
+    def send(self, line: str) -> None:
+        "Writes one line to the GUI"
+        with self.outLock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def handle(self, line: str) -> bool:
+        """Runs one command.
+
+        Returns:
+
+            bool -- False once told to quit
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        try:
+            if command == "uci":
+                self.send(f"id name {ENGINENAME}")
+                self.send(f"id author {ENGINEAUTHOR}")
+                self.send(f"option name Hash type spin default {DEFAULTHASHMB} min 1 max {MAXHASHMB}")
+                self.send("option name Clear Hash type button")
+                self.send("uciok")
+            elif command == "isready":
+                self.send("readyok")
+            elif command == "setoption":
+                self.stop()
+                self.setOption(args)
+            elif command == "ucinewgame":
+                self.stop()
+                self.searcher.table.clear()
+                self.position = position.startPosition()
+            elif command == "position":
+                self.stop()
+                self.setPosition(args)
+            elif command == "go":
+                self.stop()
+                self.go(args)
+            elif command == "stop":
+                self.stop()
+            elif command == "quit":
+                self.stop()
+                return False
+            else:
+                self.send(f"info string Unknown command: {command}")
+        except (ValueError, IndexError) as e:
+            self.send(f"info string Could not run {line.strip()}: {e}")
+        return True
+
+    def setOption(self, args: List[str]) -> None:
+        "setoption name <name> [value <value>]"
+        text = " ".join(args)
+        name, _, value = text.partition(" value ")
+        name = name.removeprefix("name ").strip().lower()
+        if name == "hash":
+            sizeMb = max(1, min(int(value), MAXHASHMB))
+            self.searcher = searcher(transpositionTable(sizeMb), self.stopEvent)
+        elif name == "clear hash":
+            self.searcher.table.clear()
+        else:
+            self.send(f"info string Unknown option: {name}")
+
+    def setPosition(self, args: List[str]) -> None:
+        "position startpos|fen <fen> [moves <move> ...]"
+        movesAt = args.index("moves") if "moves" in args else len(args)
+        if args[0] == "startpos":
+            pos = position.startPosition()
+        elif args[0] == "fen":
+            pos = position.fromFen(" ".join(args[1:movesAt]))
+        else:
+            raise ValueError(f"Expected startpos or fen, got {args[0]}")
+        for uciMove in args[movesAt + 1 :]:
+            legal = {moveToUci(m): m for m in pos.legalMoves()}
+            if uciMove not in legal:
+                raise ValueError(f"Illegal move {uciMove} in {pos.toFen()}")
+            pos.makeMove(legal[uciMove])
+        self.position = pos
+
+    def go(self, args: List[str]) -> None:
+        "go [depth <n>] [movetime <ms>] [nodes <n>] [wtime|btime|winc|binc <ms>] [movestogo <n>] [infinite]"
+        values = {}
+        for i, token in enumerate(args[:-1]):
+            if args[i + 1].lstrip("-").isdigit():
+                values[token] = int(args[i + 1])
+        depth = values.get("depth")
+        timeMs = values.get("movetime")
+        nodes = values.get("nodes")
+        side = COLORNAMES[self.position.toMove]
+        if timeMs is None and f"{side}time" in values:
+            timeMs = clockBudgetMs(values[f"{side}time"], values.get(f"{side}inc", 0), values.get("movestogo"))
+        infinite = "infinite" in args or depth is None and timeMs is None and nodes is None
+        if infinite and depth is None:
+            depth = MAXDEPTH  # Until stopped
+
+        self.stopEvent.clear()
+        self.thread = threading.Thread(
+            target=self._search, args=(self.position.copy(), depth, timeMs, nodes, infinite), daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        "Stops a running search, returning once it has sent its bestmove"
+        if self.thread is not None:
+            self.stopEvent.set()
+            self.thread.join()
+            self.thread = None
+
+    def _search(
+        self,
+        pos: position,
+        depth: Union[int, None],
+        timeMs: Union[int, None],
+        nodes: Union[int, None],
+        infinite: bool = False,
+    ):
+        """Runs on the search thread, sends info after each iteration and bestmove at the end.
+        If infinite, bestmove waits for stop even when the search finishes first (a mate found, or MAXDEPTH).
+        """
+        move = 0
+        ponder = ""
+        try:
+            result = self.searcher.search(pos, depth=depth, timeMs=timeMs, nodes=nodes, onIteration=self._sendInfo)
+            move = result["move"]
+            ponder = f" ponder {moveToUci(result['pv'][1])}" if len(result["pv"]) > 1 else ""
+            if infinite:
+                self.stopEvent.wait()
+        finally:
+            self.send(f"bestmove {moveToUci(move)}{ponder}" if move else "bestmove 0000")
+
+    def _sendInfo(self, result: searchResult) -> None:
+        nps = result["nodes"] * 1000 // max(result["timeMs"], 1)
+        self.send(
+            f"info depth {result['depth']} score {scoreToUci(result['score'])} nodes {result['nodes']} nps {nps} "
+            f"time {result['timeMs']} hashfull {self.searcher.table.hashfull()} pv {pv2Str(result['pv'])}"
+        )
+
+
+# %% Main
+def main(commands: Union[Iterable[str], None] = None) -> None:
+    "Runs the engine on commands, one per line, until quit. Defaults to reading stdin."
+    engine = uciEngine()
+    for line in commands if commands is not None else sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop()
+
+
+# Run from this directory with python -m uci, then point a GUI or tournament manager at it
+if __name__ == "__main__":
+    main()
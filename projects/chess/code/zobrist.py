@@ -0,0 +1,29 @@
+# %% Imports
+import random
+
+
+# %% Zobrist keys
+# Fixed seed so keys (and anything stored using them) are stable across runs
+ZOBRISTSEED = 8675309
+_rng = random.Random(ZOBRISTSEED)
+
+PIECEKEYS: list[list[int]] = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]  # [piece code][square]
+SIDEKEY: int = _rng.getrandbits(64)  # XORed in when black is to move
+EPFILEKEYS: list[int] = [_rng.getrandbits(64) for _ in range(8)]  # XORed in when en passant is possible on a file
+_castleBitKeys = [_rng.getrandbits(64) for _ in range(4)]
+
+
+def getCastleKeys() -> list[int]:
+    "Returns a key per castling rights value 0..15, the XOR of the keys of each right held"
+    out = []
+    for rights in range(16):
+        key = 0
+        for bit in range(4):
+            if rights & (1 << bit):
+                key ^= _castleBitKeys[bit]
+        out.append(key)
+    return out
+
+
+# CASTLEKEYS[a] ^ CASTLEKEYS[b] == CASTLEKEYS[a ^ b], so a change of rights is one lookup
+CASTLEKEYS = getCastleKeys()